@@ -0,0 +1,259 @@
+"""Бенчмарки горячих путей парсера на локальных фикстурах.
+
+Запуск: `python -m benchmarks [--toc-sizes 100 1000] [--concurrency 1 4 8] [--output bench.json]`
+"""
+
+from typing import Any
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from pathlib import Path
+
+import aiohttp
+from playwright.async_api import Browser, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from parser.browser import launch_browser, new_context
+from parser.http import fetch_document_html
+from parser.modules.db import DocumentLoader, extract_chapter_tree
+from parser.modules.news import find_news
+from parser.pool import PagePool
+from parser.settings import BrowserSettings
+from parser.utils import DEFAULT_HTML_PARSER, html2md_pipeline, md_links_filter
+
+from .fixtures import build_document_html
+from .server import BenchmarkServer
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://its.1c.ru"
+
+# Тяжёлые зависимости, которые не должны загружаться при импорте лёгких модулей
+HEAVY_MODULES = ("playwright", "bs4", "markdownify", "html2text", "pydantic_settings", "aiohttp")
+# Модули, импорт которых должен обходиться без тяжёлых зависимостей:
+# точка входа CLI и модуль, который загружает каждый процесс конвертации
+LIGHT_MODULES = ("parser.cli", "parser.converter")
+
+
+async def measure(
+        name: str, params: dict[str, Any], func: Callable[[], Awaitable[object]], repeat: int
+) -> dict[str, Any]:
+    """Выполняет замер `repeat` раз и возвращает статистику в секундах"""
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    result = {
+        "benchmark": name,
+        "params": params,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+    logger.info(
+        "%-28s %-40s min %.4fs  median %.4fs",
+        name,
+        " ".join(f"{key}={value}" for key, value in params.items()),
+        result["min"],
+        result["median"],
+    )
+    return result
+
+
+async def bench_conversion(document_sizes: list[int], repeat: int) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for size in document_sizes:
+        html_content = build_document_html(size)
+        for parser in dict.fromkeys(("html.parser", DEFAULT_HTML_PARSER)):
+
+            async def convert(html_content: str = html_content, parser: str = parser) -> None:
+                html2md_pipeline(html_content, BASE_URL, parser)
+
+            results.append(await measure(
+                "html2md_pipeline", {"size": size, "parser": parser}, convert, repeat
+            ))
+        md_text = html2md_pipeline(html_content, BASE_URL)
+
+        async def filter_links(md_text: str = md_text) -> None:
+            md_links_filter(md_text, BASE_URL)
+
+        results.append(await measure("md_links_filter", {"size": size}, filter_links, repeat))
+    return results
+
+
+async def bench_http(
+        concurrency_levels: list[int], documents: int, repeat: int
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    async with BenchmarkServer() as server:
+        urls = [f"{server.base_url}/db/bench#content:{index}:hdoc" for index in range(documents)]
+        for concurrency in concurrency_levels:
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=concurrency)
+            ) as session:
+
+                async def parse_all(session: aiohttp.ClientSession = session) -> None:
+                    for html_content in await asyncio.gather(
+                        *(fetch_document_html(session, url) for url in urls)
+                    ):
+                        html2md_pipeline(html_content or "", BASE_URL)
+
+                results.append(await measure(
+                    "parse_document_content[http]",
+                    {"documents": documents, "concurrency": concurrency},
+                    parse_all,
+                    repeat,
+                ))
+    return results
+
+
+async def bench_browser(
+        browser: Browser,
+        toc_sizes: list[int],
+        news_sizes: list[int],
+        concurrency_levels: list[int],
+        documents: int,
+        repeat: int,
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for toc_size in toc_sizes:
+        async with BenchmarkServer(toc_size=toc_size) as server:
+
+            async def extract(base_url: str = server.base_url) -> None:
+                await extract_chapter_tree(browser, "/db/bench", base_url=base_url)
+
+            results.append(await measure(
+                "extract_chapter_tree", {"toc_size": toc_size}, extract, repeat
+            ))
+    for news_size in news_sizes:
+        async with BenchmarkServer(news_size=news_size) as server:
+
+            async def list_news(news_url: str = f"{server.base_url}/news") -> None:
+                await find_news(browser, datetime(2025, 9, 1), news_url)  # noqa: DTZ001
+
+            results.append(await measure("find_news", {"news_size": news_size}, list_news, repeat))
+    async with BenchmarkServer() as server:
+        urls = [f"{server.base_url}/db/bench#content:{index}:hdoc" for index in range(documents)]
+        for concurrency in concurrency_levels:
+            async with PagePool(browser.contexts[0], size=concurrency) as page_pool:
+                loader = DocumentLoader(page_pool)
+
+                async def parse_all(loader: DocumentLoader = loader) -> None:
+                    await asyncio.gather(*(loader.load(url) for url in urls))
+
+                results.append(await measure(
+                    "parse_document_content[browser]",
+                    {"documents": documents, "concurrency": concurrency},
+                    parse_all,
+                    repeat,
+                ))
+    return results
+
+
+async def import_time(module: str) -> tuple[float, set[str]]:
+    """Импортирует модуль в чистом интерпретаторе с `-X importtime`.
+
+    :return Суммарное время импорта модуля в секундах и загруженные тяжёлые зависимости.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-X", "importtime", "-c", f"import {module}",
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode:
+        raise RuntimeError(f"Failed to import {module}: {stderr.decode()}")
+    cumulative = 0.0
+    loaded: set[str] = set()
+    # Строки вида `import time: <собственное, мкс> | <суммарное, мкс> | <модуль>`
+    for line in stderr.decode().splitlines()[1:]:
+        _, cumulative_time, name = line.split("|")
+        name = name.strip()
+        if name.split(".")[0] in HEAVY_MODULES:
+            loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(cumulative_time) / 1_000_000
+    return cumulative, loaded
+
+
+async def bench_imports(modules: list[str], repeat: int) -> list[dict[str, Any]]:
+    """Время запуска интерпретатора с импортом модуля (то, что платит каждый процесс)"""
+    results: list[dict[str, Any]] = []
+    for module in modules:
+        import_times: list[float] = []
+        loaded: set[str] = set()
+
+        async def import_module(
+                module: str = module,
+                import_times: list[float] = import_times,
+                loaded: set[str] = loaded,
+        ) -> None:
+            cumulative, heavy_modules = await import_time(module)
+            import_times.append(cumulative)
+            loaded.update(heavy_modules)
+
+        result = await measure("import", {"module": module}, import_module, repeat)
+        result["import_median"] = statistics.median(import_times)
+        result["heavy_modules"] = sorted(loaded)
+        if module in LIGHT_MODULES and loaded:
+            logger.warning("%s imports heavy modules: %s", module, ", ".join(sorted(loaded)))
+        results.append(result)
+    return results
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, Any]]:
+    results = await bench_imports(args.import_modules, args.repeat)
+    results += await bench_conversion(args.document_sizes, args.repeat)
+    results += await bench_http(args.concurrency, args.documents, args.repeat)
+    if args.no_browser:
+        return results
+    async with async_playwright() as playwright:
+        try:
+            browser = await launch_browser(playwright, BrowserSettings(allowed_hosts=set()))
+        except PlaywrightError as e:
+            logger.warning("Browser benchmarks skipped: %s", str(e).splitlines()[0])
+            return results
+        await new_context(browser, BrowserSettings(allowed_hosts=set()))
+        results += await bench_browser(
+            browser,
+            args.toc_sizes,
+            args.news_sizes,
+            args.concurrency,
+            args.documents,
+            args.repeat,
+        )
+        await browser.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--toc-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--document-sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--news-sizes", type=int, nargs="+", default=[20, 200])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--import-modules",
+        nargs="+",
+        default=["parser.cli", "parser.converter", "parser.settings", "parser.worker"],
+    )
+    parser.add_argument("--no-browser", action="store_true", help="Только CPU и HTTP замеры")
+    parser.add_argument("--output", type=Path, help="Файл для сохранения результатов в JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = asyncio.run(run(args))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
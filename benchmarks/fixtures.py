@@ -0,0 +1,73 @@
+import itertools
+import re
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+# Записанные с реальных страниц фикстуры (см. `benchmarks.record`) имеют приоритет
+RECORDED_DIR = FIXTURES_DIR / "recorded"
+
+MONTH_ABBREVIATIONS = (
+    "янв", "фев", "мар", "апр", "май", "июн", "июл", "авг", "сен", "окт", "ноя", "дек",
+)
+
+
+def load_fixture(name: str) -> str:
+    """Загружает фикстуру, отдавая предпочтение записанной с реального сайта"""
+    recorded_path = RECORDED_DIR / name
+    if recorded_path.exists():
+        return recorded_path.read_text(encoding="utf-8")
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def build_toc_html(size: int, depth: int = 4, branching: int = 8) -> str:
+    """Строит оглавление раздела `#w_metadata_toc` примерно из `size` глав.
+
+    :param size: Количество глав.
+    :param depth: Глубина вложенности глав.
+    :param branching: Количество вложенных глав у каждой главы.
+    :return HTML оглавления.
+    """
+    recorded_path = RECORDED_DIR / "toc.html"
+    if recorded_path.exists():
+        return recorded_path.read_text(encoding="utf-8")
+    counter = itertools.count(1)
+
+    def build_level(level: int, budget: int) -> str:
+        items: list[str] = []
+        while budget > 0 and len(items) < (branching if level else max(budget, 1)):
+            document_id = next(counter)
+            budget -= 1
+            children_budget = min(budget, branching ** (depth - level - 1)) if level < depth else 0
+            children = build_level(level + 1, children_budget) if children_budget else ""
+            budget -= children.count("<li>")
+            items.append(
+                f'<li><a href="/db/bench#content:{document_id}:hdoc">Глава {document_id}</a>'
+                f"{children}</li>"
+            )
+        return f"<ul>{''.join(items)}</ul>"
+
+    return f'<div id="w_metadata_toc">{build_level(0, size)}</div>'
+
+
+def build_document_html(size: int = 1) -> str:
+    """Строит документ фрейма, повторяя содержимое `<body>` фикстуры `size` раз"""
+    document = load_fixture("document.html")
+    match = re.search(r"<body>(.*)</body>", document, re.DOTALL)
+    if match is None:
+        return document
+    return document.replace(match.group(1), match.group(1) * size)
+
+
+def build_news_listing_html(size: int) -> str:
+    """Строит содержимое `#news_content` из `size` новостей"""
+    item = load_fixture("news_listing_item.html")
+    return "".join(
+        item.format(
+            day=index % 28 + 1,
+            month=MONTH_ABBREVIATIONS[index % 12],
+            year=25,
+            news_id=index,
+            views=index * 7,
+        )
+        for index in range(size)
+    )
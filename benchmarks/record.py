@@ -0,0 +1,58 @@
+"""Записывает реальные страницы ИТС в фикстуры бенчмарков.
+
+Запуск: `python -m benchmarks.record [--db /db/kip] [--document /db/kip#content:26:hdoc]`
+
+Записанные фикстуры сохраняются в `benchmarks/fixtures/recorded` и не попадают в репозиторий,
+так как содержат материалы, доступные только по подписке.
+"""
+
+import argparse
+import asyncio
+
+from playwright.async_api import async_playwright
+
+from parser.auth import authenticate
+from parser.browser import launch_browser
+from parser.constants import URL
+from parser.modules.db import load_document_html
+from parser.readiness import goto_ready
+from parser.settings import get_browser_settings, get_credentials, get_session_settings
+
+from .fixtures import RECORDED_DIR
+
+
+async def record(db_path: str, document_path: str) -> None:
+    RECORDED_DIR.mkdir(parents=True, exist_ok=True)
+    browser_settings = get_browser_settings()
+    session_settings = get_session_settings()
+    async with async_playwright() as playwright:
+        browser = await launch_browser(playwright, browser_settings)
+        browser = await authenticate(
+            browser,
+            get_credentials(),
+            state_path=session_settings.state_path,
+            probe_url=session_settings.probe_url,
+            profile=browser_settings,
+        )
+        page = await browser.contexts[0].new_page()
+        await goto_ready(page, f"{URL}{db_path}", "its_toc")
+        toc_html = await page.eval_on_selector("#w_metadata_toc", "toc => toc.outerHTML")
+        (RECORDED_DIR / "toc.html").write_text(toc_html, encoding="utf-8")
+        document_html = await load_document_html(page, f"{URL}{document_path}")
+        (RECORDED_DIR / "document.html").write_text(
+            f'<html><head><meta charset="utf-8"></head><body>{document_html}</body></html>',
+            encoding="utf-8",
+        )
+        await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default="/db/kip")
+    parser.add_argument("--document", default="/db/kip#content:26:hdoc")
+    args = parser.parse_args()
+    asyncio.run(record(args.db, args.document))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Локальный сервер, воспроизводящий страницы ИТС и infostart для бенчмарков"""
+
+from aiohttp import web
+
+from .fixtures import build_document_html, build_news_listing_html, build_toc_html, load_fixture
+
+# Страница раздела: оглавление и фрейм документа, адрес которого берётся из `#content:<id>:hdoc`
+DB_PAGE = """<html><head><meta charset="utf-8"></head><body>
+{toc}
+<iframe id="w_metadata_doc_frame"></iframe>
+<script>
+    const match = location.hash.match(/content:([^:]+):hdoc/);
+    if (match) {{
+        document.getElementById('w_metadata_doc_frame').src =
+            location.pathname + '/content/' + match[1] + '/hdoc';
+    }}
+</script>
+</body></html>"""
+
+# Страница новостей: смена периода подгружает список новостей по XHR
+NEWS_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<form id="news_filter">
+    <select id="news_filter_period">
+        <option value="">-</option>
+        {options}
+    </select>
+</form>
+<div id="news_content"></div>
+<script>
+    document.getElementById('news_filter_period').addEventListener('change', async (event) => {{
+        const response = await fetch('/news/list?period=' + event.target.value);
+        document.getElementById('news_content').innerHTML = await response.text();
+    }});
+</script>
+</body></html>"""
+
+INFOSTART_LISTING_PAGE = """<html><head><meta charset="utf-8"></head><body>
+{items}
+</body></html>"""
+
+INFOSTART_LISTING_ITEM = """<div class="publication-item"><div class="publication-name">
+<a class="font-md" href="/1c/articles/{publication_id}/">Публикация {publication_id}</a>
+</div></div>"""
+
+
+class BenchmarkServer:
+    """Сервер с фикстурами заданного размера.
+
+    :param toc_size: Количество глав в оглавлении раздела.
+    :param document_size: Во сколько раз увеличивается содержимое документа.
+    :param news_size: Количество новостей в списке за месяц.
+    :param publications: Количество публикаций infostart в списке.
+    :param port: Порт сервера (0 - любой свободный).
+    """
+
+    def __init__(
+            self,
+            toc_size: int = 100,
+            document_size: int = 1,
+            news_size: int = 50,
+            publications: int = 20,
+            port: int = 0,
+    ) -> None:
+        self._toc_html = build_toc_html(toc_size)
+        self._document_html = build_document_html(document_size)
+        self._news_html = build_news_listing_html(news_size)
+        self._publications = publications
+        self._port = port
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    async def __aenter__(self) -> "BenchmarkServer":
+        app = web.Application()
+        app.router.add_get("/db/{db}", self._db_page)
+        app.router.add_get("/db/{db}/content/{document_id}/hdoc", self._document)
+        app.router.add_get("/news", self._news_page)
+        app.router.add_get("/news/list", self._news_list)
+        app.router.add_get("/news/{news_id}", self._news_article)
+        app.router.add_get("/1c/", self._infostart_listing)
+        app.router.add_get("/1c/articles/{publication_id}/", self._infostart_publication)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self._port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @staticmethod
+    def _html(text: str) -> web.Response:
+        return web.Response(text=text, content_type="text/html", charset="utf-8")
+
+    async def _db_page(self, request: web.Request) -> web.Response:
+        return self._html(DB_PAGE.format(toc=self._toc_html))
+
+    async def _document(self, request: web.Request) -> web.Response:
+        return self._html(self._document_html)
+
+    async def _news_page(self, request: web.Request) -> web.Response:
+        options = "".join(
+            f'<option value="{year}{month:02}">{month:02}.{year}</option>'
+            for year in (2024, 2025)
+            for month in range(1, 13)
+        )
+        return self._html(NEWS_PAGE.format(options=options))
+
+    async def _news_list(self, request: web.Request) -> web.Response:
+        return self._html(self._news_html)
+
+    async def _news_article(self, request: web.Request) -> web.Response:
+        return self._html(load_fixture("news_article.html"))
+
+    async def _infostart_listing(self, request: web.Request) -> web.Response:
+        items = "".join(
+            INFOSTART_LISTING_ITEM.format(publication_id=publication_id)
+            for publication_id in range(self._publications)
+        )
+        return self._html(INFOSTART_LISTING_PAGE.format(items=items))
+
+    async def _infostart_publication(self, request: web.Request) -> web.Response:
+        return self._html(load_fixture("infostart_publication.html"))
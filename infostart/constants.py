@@ -1 +1,3 @@
-URL = "https://infostart.ru"
+from parser.constants import INFOSTART_URL
+
+URL = INFOSTART_URL
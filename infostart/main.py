@@ -1,38 +1,34 @@
 import asyncio
+import logging
 
 from playwright.async_api import async_playwright
-from html_to_markdown import convert_to_markdown
 
-from infostart.constants import URL
-from parser.utils import get_current_page
+from parser.browser import launch_browser, new_context
+from parser.converter import ConversionStage
+from parser.engine import crawl_site
+from parser.modules.infostart import InfostartAdapter
+from parser.settings import get_browser_settings, get_crawl_settings
+
+logger = logging.getLogger(__name__)
 
 
 async def main() -> None:
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=True)
-        page = await get_current_page(browser)
-        await page.goto(f"{URL}/1c/")
-        await page.wait_for_selector(".publication-item")
-        elements = await page.query_selector_all(".publication-name a.font-md")
-        links: list[str] = []
-        for element in elements:
-            item_text = await element.text_content()
-            item_link = await element.get_attribute("href")
-            print(f"{item_text}:{URL + item_link}")
-            links.append(URL + item_link)
-        for link in links:
-            print(link)
-            await page.goto(link, wait_until="networkidle")
-            await page.wait_for_selector('.center-side-wrap', timeout=10000)
-            element_html = await page.evaluate('''() => {
-                        const element = document.querySelector('.center-side-wrap');
-                        return element ? element.outerHTML : null;
-                    }''')
-            ...
-            text = convert_to_markdown(element_html)
-            print(text)
-            break
+    browser_settings = get_browser_settings()
+    crawl_settings = get_crawl_settings()
+    async with async_playwright() as playwright, ConversionStage() as converter:
+        browser = await launch_browser(playwright, browser_settings)
+        await new_context(browser, browser_settings)
+        async for link, text in crawl_site(
+            browser,
+            InfostartAdapter(),
+            concurrency=crawl_settings.concurrency,
+            rate_limit=crawl_settings.rate_limit,
+            converter=converter,
+        ):
+            logger.info("%s: %s\n%s", link.title, link.url, text)
         await browser.close()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
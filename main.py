@@ -1,17 +1,25 @@
 import asyncio
+import logging
 
 from playwright.async_api import async_playwright
 
 from parser.auth import authenticate
-from parser.settings import credentials
+from parser.browser import launch_browser
+from parser.settings import get_browser_settings, get_credentials, get_session_settings
 from parser.modules.db import parse_db, parse_document_content
 from parser.constants import DB_LINKS
 
 
 async def main() -> None:
+    browser_settings = get_browser_settings()
     async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=False)
-        await authenticate(browser, credentials=credentials)
+        browser = await launch_browser(playwright, browser_settings)
+        await authenticate(
+            browser,
+            credentials=get_credentials(),
+            state_path=get_session_settings().state_path,
+            profile=browser_settings,
+        )
         dc = await parse_document_content(browser, "https://its.1c.ru/db/kip#content:26:hdoc")
         print(dc)
         '''for db_link in DB_LINKS:
@@ -23,4 +31,5 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
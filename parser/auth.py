@@ -1,24 +1,165 @@
+import asyncio
 import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import urlparse
 
-from playwright.async_api import Browser
+from playwright.async_api import Browser, BrowserContext, Page
+from playwright.async_api import Error as PlaywrightError
 
-from .constants import LOGIN_URL
-from .settings import Credentials
+from .browser import new_context
+from .constants import AUTH_PROBE_URL, LOGIN_URL
+from .settings import BrowserSettings, Credentials
 from .utils import get_current_page
 
 logger = logging.getLogger(__name__)
 
 
-async def authenticate(browser: Browser, credentials: Credentials) -> Browser:
-    """Аутентифицируется на сайте 1c.its.ru"""
-    page = await get_current_page(browser)
+class AuthenticationError(Exception):
+    """Не удалось авторизоваться на сайте"""
+
+
+async def login(page: Page, credentials: Credentials) -> None:
+    """Заполняет форму входа на login.1c.ru"""
     await page.goto(f"{LOGIN_URL}/login")
     await page.fill("#username", credentials.username)
     await page.fill("#password", credentials.password)
     await page.click("#loginButton")
     await page.wait_for_load_state("networkidle")
-    if page.url != f"{LOGIN_URL}/login":
-        logger.info("Successfully authenticated!")
-    else:
-        logger.warning("Error occurred while authentication!")
+    if page.url == f"{LOGIN_URL}/login":
+        raise AuthenticationError("Error occurred while authentication!")
+    logger.info("Successfully authenticated!")
+
+
+async def is_session_valid(context: BrowserContext, probe_url: str = AUTH_PROBE_URL) -> bool:
+    """Проверяет сессию одним лёгким запросом к закрытой странице (без открытия вкладки).
+
+    Ошибка запроса считается недействительной сессией: лучше войти заново, чем прервать обход.
+    """
+    try:
+        response = await context.request.get(probe_url)
+    except (PlaywrightError, TimeoutError) as e:
+        logger.warning("Session probe %s failed: %s", probe_url, str(e))
+        return False
+    try:
+        return response.ok and urlparse(response.url).netloc != urlparse(LOGIN_URL).netloc
+    finally:
+        await response.dispose()
+
+
+@asynccontextmanager
+async def file_lock(
+        path: Path, timeout: float = 120, stale_after: float = 300
+) -> AsyncIterator[None]:
+    """Межпроцессная блокировка на основе lock-файла.
+
+    :param path: Путь до lock-файла.
+    :param timeout: Максимальное время ожидания блокировки в секундах.
+    :param stale_after: Через сколько секунд блокировка считается брошенной.
+    """
+    deadline = time.monotonic() + timeout
+    # Операции с файлами выполняются в потоке, чтобы не блокировать цикл событий
+    while not await asyncio.to_thread(_try_lock, path, stale_after):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Could not acquire lock {path}")
+        await asyncio.sleep(0.5)
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+
+
+def _try_lock(path: Path, stale_after: float) -> bool:
+    """Создаёт lock-файл (удалив брошенный), `False` - блокировка занята другим процессом"""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime <= stale_after:
+                    return False
+                path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as lock_file:
+            lock_file.write(str(os.getpid()))
+        return True
+
+
+def _state_mtime(state_path: Path) -> float | None:
+    """Время изменения файла состояния сессии или `None`, если его нет"""
+    try:
+        return state_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _replace_state(tmp_path: Path, state_path: Path) -> None:
+    """Атомарно заменяет файл состояния сессии, оставляя доступ только владельцу"""
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, state_path)
+
+
+async def _restore_context(
+        browser: Browser, state_path: Path, probe_url: str, profile: BrowserSettings | None
+) -> BrowserContext | None:
+    if not await asyncio.to_thread(state_path.exists):
+        return None
+    context = await new_context(browser, profile, storage_state=state_path)
+    if await is_session_valid(context, probe_url):
+        logger.info("Restored authenticated session from %s", state_path)
+        return context
+    await context.close()
+    return None
+
+
+async def authenticate(
+        browser: Browser,
+        credentials: Credentials,
+        state_path: Path | None = None,
+        probe_url: str = AUTH_PROBE_URL,
+        profile: BrowserSettings | None = None,
+) -> Browser:
+    """Аутентифицируется на сайте 1c.its.ru
+
+    Если передан путь до сохранённого состояния сессии, сначала пробует
+    восстановить её, и выполняет вход только если сессия истекла. Повторный
+    вход защищён межпроцессной блокировкой: когда сессия истекает у нескольких
+    процессов одновременно, входит только один из них, остальные используют
+    сохранённое им состояние.
+
+    :param browser: Объект браузера.
+    :param credentials: Учётные данные.
+    :param state_path: Путь до файла с сохранённым состоянием сессии.
+    :param probe_url: Адрес закрытой страницы для проверки сессии.
+    :param profile: Профиль браузера для создаваемых контекстов.
+    :return Браузер, первый контекст которого авторизован.
+    """
+    if state_path is None:
+        if not browser.contexts:
+            await new_context(browser, profile)
+        await login(await get_current_page(browser), credentials)
+        return browser
+    state_mtime = await asyncio.to_thread(_state_mtime, state_path)
+    if await _restore_context(browser, state_path, probe_url, profile) is not None:
+        return browser
+    await asyncio.to_thread(state_path.parent.mkdir, parents=True, exist_ok=True)
+    async with file_lock(state_path.with_suffix(".lock")):
+        # Пока ждали блокировку, сессию мог обновить другой процесс
+        current_mtime = await asyncio.to_thread(_state_mtime, state_path)
+        if (
+                current_mtime is not None
+                and current_mtime != state_mtime
+                and await _restore_context(browser, state_path, probe_url, profile) is not None
+        ):
+            return browser
+        context = await new_context(browser, profile)
+        await login(await context.new_page(), credentials)
+        tmp_path = state_path.with_suffix(".tmp")
+        await context.storage_state(path=tmp_path)
+        await asyncio.to_thread(_replace_state, tmp_path, state_path)
     return browser
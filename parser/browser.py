@@ -0,0 +1,77 @@
+from typing import Any
+
+import logging
+from urllib.parse import urlparse
+
+from playwright.async_api import Browser, BrowserContext, Playwright, Route
+
+from .settings import BrowserSettings
+
+logger = logging.getLogger(__name__)
+
+# Отключаем кеши и фоновые сервисы Chromium, которые не нужны при обходе
+CHROMIUM_ARGS: tuple[str, ...] = (
+    "--disk-cache-size=1",
+    "--media-cache-size=1",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+)
+
+
+def match_host(host: str, domains: set[str]) -> bool:
+    """Проверяет, относится ли хост к одному из доменов (с учётом поддоменов)"""
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+def is_request_allowed(url: str, resource_type: str, settings: BrowserSettings) -> bool:
+    """Проверяет, нужно ли загружать ресурс при обходе.
+
+    :param url: Адрес ресурса.
+    :param resource_type: Тип ресурса в терминах Playwright (document, image, font, ...).
+    :param settings: Настройки профиля браузера.
+    :return `True`, если ресурс нужно загрузить.
+    """
+    if resource_type in settings.blocked_resource_types:
+        return False
+    parsed_url = urlparse(url)
+    if parsed_url.scheme not in {"http", "https"}:
+        return True
+    host = parsed_url.hostname or ""
+    if match_host(host, settings.denied_hosts):
+        return False
+    return not settings.allowed_hosts or match_host(host, settings.allowed_hosts)
+
+
+async def launch_browser(playwright: Playwright, settings: BrowserSettings) -> Browser:
+    """Запускает Chromium с профилем для обхода сайтов"""
+    return await playwright.chromium.launch(headless=settings.headless, args=list(CHROMIUM_ARGS))
+
+
+async def new_context(
+        browser: Browser, settings: BrowserSettings | None = None, **kwargs: Any
+) -> BrowserContext:
+    """Создаёт контекст браузера, в котором блокируются ненужные для обхода ресурсы.
+
+    :param browser: Объект браузера.
+    :param settings: Настройки профиля браузера, `None` - контекст без ограничений.
+    :param kwargs: Дополнительные параметры `Browser.new_context`.
+    :return Новый контекст браузера.
+    """
+    if settings is None:
+        return await browser.new_context(**kwargs)
+    context = await browser.new_context(service_workers="block", **kwargs)
+
+    async def handle_route(route: Route) -> None:
+        request = route.request
+        if is_request_allowed(request.url, request.resource_type, settings):
+            await route.continue_()
+        else:
+            await route.abort()
+
+    await context.route("**/*", handle_route)
+    return context
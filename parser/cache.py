@@ -0,0 +1,101 @@
+from typing import TypedDict
+
+import hashlib
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+
+class DocumentRecord(TypedDict):
+    url: str                    # Адрес документа
+    fetched_at: float           # Время последней загрузки (unix time)
+    etag: str | None            # Заголовок ETag последнего ответа
+    last_modified: str | None   # Заголовок Last-Modified последнего ответа
+    content_hash: str           # Хеш исходного HTML
+    markdown: str               # Документ в формате Markdown
+
+
+def hash_content(html_content: str) -> str:
+    """Вычисляет хеш исходного HTML документа"""
+    return hashlib.sha256(html_content.encode()).hexdigest()
+
+
+class DocumentIndex:
+    """Локальный индекс загруженных документов в SQLite.
+
+    Хранит для каждого адреса время загрузки, заголовки ETag/Last-Modified,
+    хеш исходного HTML и сжатый Markdown, чтобы при повторном обходе
+    не загружать и не конвертировать неизменившиеся документы.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                url TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                markdown BLOB NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def __enter__(self) -> "DocumentIndex":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def get(self, url: str) -> DocumentRecord | None:
+        """Получает запись о документе по его адресу"""
+        row = self._connection.execute(
+            "SELECT url, fetched_at, etag, last_modified, content_hash, markdown "
+            "FROM documents WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return DocumentRecord(
+            url=row[0],
+            fetched_at=row[1],
+            etag=row[2],
+            last_modified=row[3],
+            content_hash=row[4],
+            markdown=zlib.decompress(row[5]).decode(),
+        )
+
+    def put(
+            self,
+            url: str,
+            content_hash: str,
+            markdown: str,
+            etag: str | None = None,
+            last_modified: str | None = None,
+    ) -> None:
+        """Сохраняет (или обновляет) запись о документе"""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(url, fetched_at, etag, last_modified, content_hash, markdown) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, time.time(), etag, last_modified, content_hash,
+             zlib.compress(markdown.encode())),
+        )
+        self._connection.commit()
+
+    def touch(self, url: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        """Отмечает документ как проверенный, не изменяя его содержимое"""
+        self._connection.execute(
+            "UPDATE documents SET fetched_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+            "WHERE url = ?",
+            (time.time(), etag, last_modified, url),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
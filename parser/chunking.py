@@ -0,0 +1,245 @@
+from typing import Any, Literal, TextIO, TypedDict
+
+import json
+import re
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from .datastructures import ChapterNode
+from .dedup import split_blocks
+from .metrics import metrics
+from .sinks import Sink
+
+# Заголовок Markdown: `# Заголовок` ... `###### Заголовок`
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+# Подчёркивание заголовка первого (`===`) и второго (`---`) уровня
+SETEXT_PATTERN = re.compile(r"^(=+|-+)\s*$")
+# Приблизительный токен: слово, число или отдельный знак препинания
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+ShardFormat = Literal["jsonl", "parquet"]
+
+
+class Chunk(TypedDict):
+    url: str                # Адрес документа
+    path: str               # Путь главы в дереве раздела
+    depth: int              # Глубина главы в дереве раздела
+    chunk_index: int        # Порядковый номер фрагмента в документе
+    headings: list[str]     # Заголовки, внутри которых находится фрагмент
+    text: str               # Текст фрагмента в формате Markdown
+    tokens: int             # Размер фрагмента в токенах
+
+
+ChunkKey = Literal["url", "path", "depth", "chunk_index", "headings", "text", "tokens"]
+# Столбцы фрагментов в Parquet (в порядке полей `Chunk`)
+CHUNK_KEYS: tuple[ChunkKey, ...] = (
+    "url", "path", "depth", "chunk_index", "headings", "text", "tokens"
+)
+
+
+def count_tokens(text: str) -> int:
+    """Приблизительное количество токенов (без зависимости от токенизатора модели)"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def _split_oversized(block: str, max_tokens: int, counter: Callable[[str], int]) -> Iterator[str]:
+    """Разбивает слишком большой блок по строкам, а слишком длинные строки - по словам"""
+    current: list[str] = []
+    current_tokens = 0
+    for line in block.split("\n"):
+        line_tokens = counter(line)
+        parts = [(line, line_tokens)] if line_tokens <= max_tokens else [
+            (word, counter(word)) for word in line.split(" ")
+        ]
+        for part_index, (part, tokens) in enumerate(parts):
+            if current and current_tokens + tokens > max_tokens:
+                yield "".join(current).strip()
+                current, current_tokens = [], 0
+            separator = " " if part_index else "\n"
+            current.append(f"{separator}{part}" if current else part)
+            current_tokens += tokens
+    if current:
+        yield "".join(current).strip()
+
+
+def _parse_heading(block: str) -> tuple[int, str, str] | None:
+    """Распознаёт заголовок в начале блока: (уровень, текст заголовка, остаток блока)"""
+    first_line, _, rest = block.partition("\n")
+    match = HEADING_PATTERN.match(first_line)
+    if match is not None:
+        return len(match.group(1)), match.group(2), rest
+    underline, _, setext_rest = rest.partition("\n")
+    match = SETEXT_PATTERN.match(underline)
+    if match is not None and first_line.strip():
+        return 1 if match.group(1)[0] == "=" else 2, first_line.strip(), setext_rest
+    return None
+
+
+def _sections(markdown: str) -> Iterator[tuple[list[str], list[str]]]:
+    """Разбивает документ на разделы по заголовкам: (цепочка заголовков, блоки раздела)"""
+    headings: list[tuple[int, str]] = []
+    blocks: list[str] = []
+    for block in split_blocks(markdown):
+        heading = _parse_heading(block)
+        if heading is None:
+            blocks.append(block)
+            continue
+        if blocks:
+            yield [title for _, title in headings], blocks
+            blocks = []
+        level, title, rest = heading
+        while headings and headings[-1][0] >= level:
+            headings.pop()
+        headings.append((level, title))
+        if rest.strip():
+            blocks.append(rest)
+    if blocks:
+        yield [title for _, title in headings], blocks
+
+
+def chunk_markdown(
+        markdown: str,
+        max_tokens: int = 512,
+        overlap_tokens: int = 64,
+        counter: Callable[[str], int] = count_tokens,
+) -> Iterator[tuple[list[str], str, int]]:
+    """Разбивает Markdown на фрагменты по заголовкам с ограничением размера.
+
+    Фрагмент не пересекает границу раздела, внутри раздела блоки набираются
+    во фрагмент, пока не будет превышен бюджет, а следующий фрагмент начинается
+    с последних блоков предыдущего в пределах `overlap_tokens`.
+
+    :param markdown: Документ в формате Markdown.
+    :param max_tokens: Максимальный размер фрагмента в токенах.
+    :param overlap_tokens: Размер перекрытия соседних фрагментов в токенах.
+    :param counter: Функция подсчёта токенов.
+    :return Тройки из цепочки заголовков, текста фрагмента и его размера в токенах.
+    """
+    for headings, section_blocks in _sections(markdown):
+        current: list[tuple[str, int]] = []
+        current_tokens = 0
+        for section_block in section_blocks:
+            block_tokens = counter(section_block)
+            pieces = (
+                [(section_block, block_tokens)]
+                if block_tokens <= max_tokens
+                else [
+                    (piece, counter(piece))
+                    for piece in _split_oversized(section_block, max_tokens, counter)
+                ]
+            )
+            for piece, tokens in pieces:
+                if current and current_tokens + tokens > max_tokens:
+                    yield headings, "\n\n".join(text for text, _ in current), current_tokens
+                    # Перекрытие: последние блоки предыдущего фрагмента
+                    overlap: list[tuple[str, int]] = []
+                    overlap_size = 0
+                    for text, size in reversed(current):
+                        if (
+                                overlap_size + size > overlap_tokens
+                                or overlap_size + size + tokens > max_tokens
+                        ):
+                            break
+                        overlap.insert(0, (text, size))
+                        overlap_size += size
+                    current, current_tokens = overlap, overlap_size
+                current.append((piece, tokens))
+                current_tokens += tokens
+        if current:
+            yield headings, "\n\n".join(text for text, _ in current), current_tokens
+
+
+class ChunkSink(Sink):
+    """Разбивает документы на фрагменты для векторного индекса по мере их записи.
+
+    Фрагменты пишутся в шарды `part-00000.<format>` фиксированного размера.
+    Для формата Parquet нужен `pyarrow`, фрагменты шарда накапливаются в памяти.
+
+    :param path: Директория для шардов.
+    :param shard_format: Формат шардов.
+    :param shard_size: Количество фрагментов в одном шарде.
+    :param max_tokens: Максимальный размер фрагмента в токенах.
+    :param overlap_tokens: Размер перекрытия соседних фрагментов в токенах.
+    :param append: Добавить шарды к шардам прошлого запуска, а не заменить их.
+    """
+
+    def __init__(
+            self,
+            path: Path | str,
+            shard_format: ShardFormat = "jsonl",
+            shard_size: int = 10000,
+            max_tokens: int = 512,
+            overlap_tokens: int = 64,
+            append: bool = False,
+    ) -> None:
+        if shard_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401, PLC0415
+            except ImportError as e:
+                raise ImportError("pyarrow is required to write Parquet shards") from e
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._format = shard_format
+        self._shard_size = shard_size
+        self._max_tokens = max_tokens
+        self._overlap_tokens = overlap_tokens
+        shards = sorted(self._path.glob(f"part-*.{shard_format}"))
+        if not append:
+            for shard in shards:
+                shard.unlink()
+        # При продолжении обхода нумерация шардов продолжается после шардов прошлого запуска
+        self._shard_index = len(shards) if append else 0
+        self._shard_rows = 0
+        self._rows: list[Chunk] = []
+        self._file: TextIO | None = None
+
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        chunks = chunk_markdown(markdown, self._max_tokens, self._overlap_tokens)
+        for chunk_index, (headings, text, tokens) in enumerate(chunks):
+            self._write_chunk(Chunk(
+                url=chapter.url,
+                path=chapter.path(),
+                depth=chapter.current_depth(),
+                chunk_index=chunk_index,
+                headings=headings,
+                text=text,
+                tokens=tokens,
+            ))
+        if self._file is not None:
+            self._file.flush()
+
+    def _write_chunk(self, chunk: Chunk) -> None:
+        metrics.increment("chunks")
+        if self._format == "parquet":
+            self._rows.append(chunk)
+        else:
+            if self._file is None:
+                self._file = self._shard_path().open("w", encoding="utf-8")
+            self._file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+        self._shard_rows += 1
+        if self._shard_rows >= self._shard_size:
+            self._flush_shard()
+
+    def _shard_path(self) -> Path:
+        return self._path / f"part-{self._shard_index:05}.{self._format}"
+
+    def _flush_shard(self) -> None:
+        if not self._shard_rows:
+            return
+        if self._format == "parquet":
+            import pyarrow as pa  # noqa: PLC0415
+            import pyarrow.parquet as pq  # noqa: PLC0415
+
+            columns: dict[str, list[Any]] = {
+                name: [row[name] for row in self._rows] for name in CHUNK_KEYS
+            }
+            pq.write_table(pa.table(columns), self._shard_path())
+            self._rows = []
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+        self._shard_rows = 0
+        self._shard_index += 1
+
+    def close(self) -> None:
+        self._flush_shard()
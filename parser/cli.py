@@ -0,0 +1,94 @@
+"""Командная строка парсера.
+
+Запуск: `python -m parser crawl db|news|infostart`, `python -m parser distributed`,
+`python -m parser worker`.
+
+Модули обхода (Playwright, конвертеры, настройки) импортируются только внутри
+выбранной команды, поэтому `--help` и короткоживущие процессы не платят за импорт
+того, что им не нужно.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+
+def _month(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m")  # noqa: DTZ007
+
+
+def crawl_db(args: argparse.Namespace) -> None:
+    if args.resume:
+        # Через окружение, чтобы настройку получили и дочерние процессы
+        os.environ["CRAWL_RESUME"] = "true"
+    from parser.worker import its_worker  # noqa: PLC0415
+
+    asyncio.run(its_worker())
+
+
+def crawl_news(args: argparse.Namespace) -> None:
+    from parser.modules.news import NewsAdapter  # noqa: PLC0415
+    from parser.worker import site_worker  # noqa: PLC0415
+
+    asyncio.run(site_worker(NewsAdapter(args.start, args.end or args.start)))
+
+
+def crawl_infostart(args: argparse.Namespace) -> None:
+    from parser.modules.infostart import InfostartAdapter  # noqa: PLC0415
+    from parser.worker import site_worker  # noqa: PLC0415
+
+    asyncio.run(site_worker(InfostartAdapter(args.section, args.pages)))
+
+
+def distributed(args: argparse.Namespace) -> None:
+    from parser.distributed import run_distributed  # noqa: PLC0415
+
+    run_distributed(args.workers, enqueue=not args.no_enqueue)
+
+
+def worker(args: argparse.Namespace) -> None:
+    from parser.distributed import run_worker  # noqa: PLC0415
+
+    run_worker(args.worker_id)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m parser", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    crawl = commands.add_parser("crawl", help="Обход одного источника")
+    sources = crawl.add_subparsers(dest="source", required=True)
+    db = sources.add_parser("db", help="Разделы документации ИТС")
+    db.add_argument(
+        "--resume",
+        action="store_true",
+        help="Продолжить прерванный обход по журналу (CRAWL_RESUME)",
+    )
+    db.set_defaults(handler=crawl_db)
+    news = sources.add_parser("news", help="Новости ИТС за диапазон месяцев")
+    news.add_argument("--start", type=_month, required=True, help="Первый месяц, YYYY-MM")
+    news.add_argument("--end", type=_month, help="Последний месяц, YYYY-MM")
+    news.set_defaults(handler=crawl_news)
+    infostart = sources.add_parser("infostart", help="Публикации infostart")
+    infostart.add_argument("--section", default="/1c/", help="Путь до раздела публикаций")
+    infostart.add_argument("--pages", type=int, default=1, help="Количество страниц списка")
+    infostart.set_defaults(handler=crawl_infostart)
+
+    coordinator = commands.add_parser("distributed", help="Координатор и обработчики очереди")
+    coordinator.add_argument("--workers", type=int, help="Количество процессов-обработчиков")
+    coordinator.add_argument(
+        "--no-enqueue", action="store_true", help="Продолжить обработку заполненной очереди"
+    )
+    coordinator.set_defaults(handler=distributed)
+    queue_worker = commands.add_parser("worker", help="Обработчик общей очереди документов")
+    queue_worker.add_argument("--worker-id", help="Идентификатор обработчика")
+    queue_worker.set_defaults(handler=worker)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    args.handler(args)
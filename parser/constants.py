@@ -1,6 +1,12 @@
 # Основной адрес сайта 1C ИТС
 URL = "https://its.1c.ru"
 LOGIN_URL = "https://login.1c.ru"
+# Страница новостей ИТС
+NEWS_URL = f"{URL}/news"
+# Основной адрес сайта infostart
+INFOSTART_URL = "https://infostart.ru"
+# Закрытая страница для проверки сессии (без авторизации перенаправляет на LOGIN_URL)
+AUTH_PROBE_URL = f"{URL}/db/kip/content/26/hdoc"
 # Ссылки с разделами документации
 DB_LINKS: tuple = (
     "/db/edtdoc",
@@ -12,3 +18,11 @@ DB_LINKS: tuple = (
 # Для валидации
 IMAGE_EXTENSIONS: set[str] = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg", ".tiff", ".ico"}
 IMAGE_PATTERNS: set[str] = {"/image/", "/img/", "/images/", "/media/", "/uploads/", "image.", "img."}
+
+# Адрес содержимого документа (источник фрейма `#w_metadata_doc_frame`)
+FRAME_URL_TEMPLATE = "{base_url}/db/{db}/content/{document_id}/hdoc"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
@@ -0,0 +1,156 @@
+from typing import Literal
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .metrics import Metrics, metrics
+from .utils import html2md_pipeline
+
+# Доступные конвертеры HTML -> Markdown
+ConverterName = Literal["its", "html_to_markdown", "html2text"]
+
+
+def convert(converter: ConverterName, html_content: str, base_url: str) -> str:
+    """Конвертирует HTML в Markdown выбранным конвертером.
+
+    :param converter: Название конвертера.
+    :param html_content: HTML содержимое документа.
+    :param base_url: Основной адрес сайта.
+    :return Содержимое документа в формате Markdown.
+    """
+    if converter == "its":
+        return html2md_pipeline(html_content, base_url)
+    if converter == "html_to_markdown":
+        from html_to_markdown import convert_to_markdown  # noqa: PLC0415
+
+        return convert_to_markdown(html_content)
+    if converter == "html2text":
+        from html2text import html2text  # noqa: PLC0415
+
+        return html2text(html_content, base_url)
+    raise ValueError(f"Unknown converter: {converter}")
+
+
+def convert_batch(
+        documents: list[tuple[ConverterName, str, str]]
+) -> tuple[list[str | Exception], Metrics]:
+    """Конвертирует пачку документов в дочернем процессе.
+
+    Ошибка конвертации одного документа не влияет на остальные документы пачки.
+    Вместе с результатами возвращаются метрики, собранные в дочернем процессе.
+    """
+    results: list[str | Exception] = []
+    for converter, html_content, base_url in documents:
+        try:
+            results.append(convert(converter, html_content, base_url))
+        except Exception as e:  # noqa: BLE001
+            results.append(e)
+    return results, metrics.pop()
+
+
+class ConversionStage:
+    """Стадия конвертации HTML -> Markdown в пуле процессов.
+
+    Загрузчики отправляют HTML в ограниченную очередь, из которой документы
+    пачками передаются в пул процессов, поэтому загрузка и конвертация
+    выполняются параллельно и не блокируют цикл событий.
+
+    :param max_workers: Количество процессов (по умолчанию - количество ядер).
+    :param queue_size: Максимальный размер очереди документов на конвертацию.
+    :param batch_size: Максимальное количество документов в одной пачке.
+    :param batch_bytes: Документы объединяются в пачку, пока её размер меньше этого значения.
+    """
+
+    def __init__(
+            self,
+            max_workers: int | None = None,
+            queue_size: int = 64,
+            batch_size: int = 16,
+            batch_bytes: int = 64 * 1024,
+    ) -> None:
+        self._max_workers = max_workers or multiprocessing.cpu_count()
+        self._batch_size = batch_size
+        self._batch_bytes = batch_bytes
+        self._queue: asyncio.Queue[
+            tuple[ConverterName, str, str, asyncio.Future[str]] | None
+        ] = asyncio.Queue(maxsize=queue_size)
+        self._executor: ProcessPoolExecutor | None = None
+        self._consumer: asyncio.Task[None] | None = None
+        self._batches: set[asyncio.Task[None]] = set()
+
+    async def __aenter__(self) -> "ConversionStage":
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._consumer = asyncio.create_task(self._consume())
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self._queue.put(None)
+        if self._consumer is not None:
+            await self._consumer
+        if self._batches:
+            await asyncio.gather(*self._batches)
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    async def convert(
+            self, html_content: str, base_url: str, converter: ConverterName = "its"
+    ) -> str:
+        """Отправляет документ на конвертацию и дожидается результата.
+
+        :param html_content: HTML содержимое документа.
+        :param base_url: Основной адрес сайта.
+        :param converter: Название конвертера.
+        :return Содержимое документа в формате Markdown.
+        """
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        await self._queue.put((converter, html_content, base_url, future))
+        return await future
+
+    async def _consume(self) -> None:
+        # Не держим в пуле больше пачек, чем может обработать пара процессов на ядро
+        slots = asyncio.Semaphore(self._max_workers * 2)
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            size = len(item[1])
+            while (
+                    len(batch) < self._batch_size
+                    and size < self._batch_bytes
+                    and not self._queue.empty()
+            ):
+                next_item = self._queue.get_nowait()
+                if next_item is None:
+                    self._queue.put_nowait(None)
+                    break
+                batch.append(next_item)
+                size += len(next_item[1])
+            await slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(
+            self, batch: list[tuple[ConverterName, str, str, asyncio.Future[str]]]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        documents = [(converter, html, base_url) for converter, html, base_url, _ in batch]
+        try:
+            results, worker_metrics = await loop.run_in_executor(
+                self._executor, convert_batch, documents
+            )
+            metrics.merge(worker_metrics)
+        except Exception as e:  # noqa: BLE001
+            results = [e] * len(batch)
+        for (*_, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
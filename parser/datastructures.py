@@ -8,12 +8,32 @@ from collections.abc import Iterator
 from pydantic import BaseModel, Field
 
 
-class ChapterNode(BaseModel):
-    """Дерево для работы с параграфами в разделе документации"""
+class ChapterModel(BaseModel):
+    """Представление дерева глав для экспорта и сериализации"""
     name: str
     url: str
-    children: list[ChapterNode] = Field(default_factory=list)
-    parent: ChapterNode | None = None
+    children: list[ChapterModel] = Field(default_factory=list)
+
+
+class ChapterNode:
+    """Дерево для работы с параграфами в разделе документации.
+
+    Все узлы дерева разделяют общий индекс URL -> узел, поэтому поиск по адресу
+    выполняется за O(глубина дерева). Путь и глубина узла вычисляются один раз и кешируются
+    до перемещения узла в другое дерево.
+    """
+    __slots__ = ("_depth", "_index", "_path", "children", "name", "parent", "url")
+
+    def __init__(self, name: str, url: str, children: list[ChapterNode] | None = None) -> None:
+        self.name = name
+        self.url = url
+        self.children: list[ChapterNode] = []
+        self.parent: ChapterNode | None = None
+        self._index: dict[str, ChapterNode] = {url: self}
+        self._path: str | None = None
+        self._depth: int | None = None
+        for child in children or ():
+            self.add_child(child)
 
     @property
     def type(self) -> Literal["root", "children", "leaf"]:
@@ -26,64 +46,131 @@ class ChapterNode(BaseModel):
 
     def path(self) -> str:
         """Полный путь до выбранного узла в формате: 'name1|name2|...'"""
-        parts: list[str] = []
-        current = self
-        while current is not None:
-            parts.append(current.name)
-            current = current.parent
-        return "|".join(parts[::-1])
+        if self._path is None:
+            self._path = (
+                self.name if self.parent is None else f"{self.parent.path()}|{self.name}"
+            )
+        return self._path
 
     def max_depth(self) -> int:
         """Максимальная глубина относительно выбранного узла"""
-        if not self.children:
-            return 0
-        max_depth = 0
-        for child in self.children:
-            depth = child.max_depth()
-            if depth > max_depth:
-                max_depth = depth
-        return max_depth + 1
-
-    def current_depth(self) -> int:
-        """Текущая глубина"""
         depth = 0
-        current = self.parent
-        while current is not None:
+        level = self.children
+        while level:
             depth += 1
-            current = current.parent
+            level = [child for node in level for child in node.children]
         return depth
 
+    def current_depth(self) -> int:
+        """Текущая глубина"""
+        if self._depth is None:
+            self._depth = 0 if self.parent is None else self.parent.current_depth() + 1
+        return self._depth
+
     def add_child(self, child: ChapterNode) -> None:
-        """Добавляет наследника"""
+        """Добавляет наследника (узел с родителем переносится из прежнего места в дереве)"""
+        node: ChapterNode | None = self
+        while node is not None:
+            if node is child:
+                raise ValueError("Chapter cannot be added to its own subtree")
+            node = node.parent
+        if child.parent is not None:
+            child.parent._detach(child)
         child.parent = self
         self.children.append(child)
+        for node in child.iterate_dfs():
+            node._index = self._index
+            node._path = None
+            node._depth = None
+            self._index.setdefault(node.url, node)
+
+    def _detach(self, child: ChapterNode) -> None:
+        """Убирает наследника и его поддерево из узла и общего индекса"""
+        self.children.remove(child)
+        child.parent = None
+        removed = {
+            node.url for node in child.iterate_dfs() if self._index.get(node.url) is node
+        }
+        for url in removed:
+            del self._index[url]
+        if removed:
+            # В дереве могут остаться другие узлы с теми же адресами
+            root = self
+            while root.parent is not None:
+                root = root.parent
+            for node in root.iterate_dfs():
+                if node.url in removed:
+                    self._index.setdefault(node.url, node)
+
+    def lineage(self) -> list[tuple[str, str]]:
+        """Пары (название, URL) от корня дерева до выбранного узла"""
+        nodes: list[tuple[str, str]] = []
+        node: ChapterNode | None = self
+        while node is not None:
+            nodes.append((node.name, node.url))
+            node = node.parent
+        return nodes[::-1]
+
+    @classmethod
+    def from_lineage(cls, lineage: list[tuple[str, str]]) -> ChapterNode:
+        """Восстанавливает цепочку узлов от корня по результату `lineage` и возвращает последний"""
+        node: ChapterNode | None = None
+        for name, url in lineage:
+            child = cls(name=name, url=url)
+            if node is not None:
+                node.add_child(child)
+            node = child
+        if node is None:
+            raise ValueError("Lineage must not be empty")
+        return node
 
     def find(self, url: str) -> ChapterNode | None:
-        """Находит узел по его URL адресу"""
-        if self.url == url:
-            return self
-        for child in self.children:
-            paragraph = child.find(url)
-            if paragraph is not None:
-                return paragraph
-        return None
+        """Находит узел по его URL адресу в поддереве выбранного узла"""
+        found = self._index.get(url)
+        if found is None:
+            return None
+        node: ChapterNode | None = found
+        while node is not None:
+            if node is self:
+                return found
+            node = node.parent
+        # Индекс хранит первый узел с адресом, а в поддереве может быть другой
+        return next((node for node in self.iterate_dfs() if node.url == url), None)
 
     def __repr__(self) -> str:
         return self.to_str(indent=0)
 
     def to_str(self, indent: int = 0) -> str:
         """Приводит вершину к строковому формату (для отладки и логирования)"""
-        indent_str = "---" * indent
-        node_str = f"{indent_str}{self.name} ({self.url}) [{self.type}]\n"
-        for child in self.children:
-            node_str += child.to_str(indent + 1)
-        return node_str
+        lines: list[str] = []
+        stack = [(self, indent)]
+        while stack:
+            node, node_indent = stack.pop()
+            lines.append(f"{'---' * node_indent}{node.name} ({node.url}) [{node.type}]\n")
+            stack.extend((child, node_indent + 1) for child in reversed(node.children))
+        return "".join(lines)
+
+    def to_model(self) -> ChapterModel:
+        """Приводит дерево к pydantic модели для экспорта"""
+        root_model = ChapterModel.model_construct(name=self.name, url=self.url, children=[])
+        stack = [(self, root_model)]
+        while stack:
+            node, model = stack.pop()
+            for child in node.children:
+                child_model = ChapterModel.model_construct(
+                    name=child.name, url=child.url, children=[]
+                )
+                model.children.append(child_model)
+                stack.append((child, child_model))
+        return root_model
 
     def iterate_dfs(self) -> Iterator[ChapterNode]:
         """Итерация в глубину (Depth-First Search)"""
-        yield self
-        for child in self.children:
-            yield from child.iterate_dfs()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
 
     def iterate_bfs(self) -> Iterator[ChapterNode]:
         """Итерация в ширину (Breadth-First Search"""
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TextIO, TypedDict
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from collections.abc import Iterator
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlparse
+
+from .datastructures import ChapterNode
+from .metrics import metrics
+from .sinks import Sink
+
+# aiohttp нужен только для загрузки картинок, `split_blocks` используется и без него
+if TYPE_CHECKING:
+    import aiohttp
+
+# Адрес картинки в Markdown ссылке вида `![alt](url "title")`
+IMAGE_URL_PATTERN = re.compile(r"!\[[^\]\n]*\]\(\s*<?([^)\s>]+)")
+
+logger = logging.getLogger(__name__)
+
+
+class BlockRef(TypedDict, total=False):
+    hash: str       # Хеш блока в хранилище
+    text: str       # Короткий блок, который хранится прямо в документе
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def split_blocks(markdown: str) -> Iterator[str]:
+    """Разбивает Markdown на блоки по пустым строкам, не разрывая блоки кода"""
+    lines: list[str] = []
+    in_code = False
+    for line in markdown.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        if not line.strip() and not in_code:
+            if lines:
+                yield "\n".join(lines)
+                lines = []
+            continue
+        lines.append(line)
+    if lines:
+        yield "\n".join(lines)
+
+
+class BlockStore:
+    """Контентно-адресуемое хранилище блоков документов на диске.
+
+    Каждый уникальный блок хранится один раз в файле `blocks/<xx>/<hash>.md`,
+    адреса картинок записываются в `images.txt` для последующей однократной загрузки.
+    Адрес записывается тем процессом, который первым создал для него файл-метку
+    `image_urls/<xx>/<hash>`, поэтому в `images.txt` нет повторов, даже если в одно
+    хранилище пишут несколько обработчиков.
+
+    Счётчики `bytes_total` и `bytes_stored` относятся только к документам, записанным
+    через этот объект, и не зависят от блоков, сохранённых прошлыми запусками.
+
+    :param path: Директория хранилища (общая для всех разделов и обработчиков).
+    :param min_block_size: Блоки короче этого размера не выносятся в хранилище.
+    """
+
+    def __init__(self, path: Path | str, min_block_size: int = 64) -> None:
+        self.path = Path(path)
+        (self.path / "blocks").mkdir(parents=True, exist_ok=True)
+        self._min_block_size = min_block_size
+        self._known_blocks: set[str] = set()
+        self._known_images: set[str] = set()
+        self.bytes_total = 0
+        self.bytes_stored = 0
+        self._images_file = open(self.path / "images.txt", "a", encoding="utf-8")  # noqa: SIM115
+
+    def block_path(self, block_hash: str) -> Path:
+        return self.path / "blocks" / block_hash[:2] / f"{block_hash}.md"
+
+    def add_block(self, block: str) -> BlockRef:
+        """Сохраняет блок (если его ещё нет в хранилище) и возвращает ссылку на него"""
+        size = len(block.encode())
+        self.bytes_total += size
+        metrics.increment("dedup_blocks")
+        metrics.increment("dedup_bytes", size)
+        if len(block) < self._min_block_size:
+            self._count_stored(size)
+            return BlockRef(text=block)
+        block_hash = hash_text(block)
+        if block_hash in self._known_blocks:
+            return BlockRef(hash=block_hash)
+        self._known_blocks.add(block_hash)
+        # Первое вхождение блока в этом запуске, даже если файл остался от прошлых запусков
+        self._count_stored(size)
+        block_path = self.block_path(block_hash)
+        if not block_path.exists():
+            block_path.parent.mkdir(exist_ok=True)
+            tmp_path = block_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(block, encoding="utf-8")
+            os.replace(tmp_path, block_path)
+            metrics.increment("dedup_blocks_stored")
+        return BlockRef(hash=block_hash)
+
+    def _count_stored(self, size: int) -> None:
+        self.bytes_stored += size
+        metrics.increment("dedup_bytes_stored", size)
+
+    def add_images(self, markdown: str) -> list[str]:
+        """Запоминает адреса картинок документа и возвращает их"""
+        urls = IMAGE_URL_PATTERN.findall(markdown)
+        metrics.increment("dedup_images", len(urls))
+        for url in urls:
+            if url not in self._known_images:
+                self._known_images.add(url)
+                if self._claim_image(url):
+                    self._images_file.write(f"{url}\n")
+        self._images_file.flush()
+        return urls
+
+    def _claim_image(self, url: str) -> bool:
+        """Создаёт файл-метку адреса картинки, `False` - адрес уже записан другим процессом"""
+        url_hash = hash_text(url)
+        marker_path = self.path / "image_urls" / url_hash[:2] / url_hash
+        marker_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            marker_path.touch(exist_ok=False)
+        except FileExistsError:
+            return False
+        return True
+
+    def read_block(self, block: BlockRef) -> str:
+        if "text" in block:
+            return block["text"]
+        return self.block_path(block["hash"]).read_text(encoding="utf-8")
+
+    def restore_document(self, blocks: list[BlockRef]) -> str:
+        """Собирает Markdown документа из ссылок на блоки"""
+        return "\n\n".join(self.read_block(block) for block in blocks)
+
+    def duplication_ratio(self) -> float:
+        """Доля байт документов, которые не пришлось записывать благодаря дедупликации"""
+        return 1 - self.bytes_stored / self.bytes_total if self.bytes_total else 0.0
+
+    def close(self) -> None:
+        self._images_file.close()
+
+
+class DedupSink(Sink):
+    """Записывает документы ссылками на блоки в контентно-адресуемом хранилище.
+
+    В JSONL файл раздела пишутся только метаданные документа, ссылки на блоки
+    и адреса картинок, повторяющиеся блоки хранятся в `BlockStore` один раз.
+
+    :param path: Путь до JSONL файла раздела.
+    :param store_path: Директория хранилища блоков.
+    :param append: Дописать документы в существующий файл, а не перезаписать его
+    (хранилище блоков в любом случае общее для всех запусков).
+    """
+
+    def __init__(self, path: Path | str, store_path: Path | str, append: bool = False) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")  # noqa: SIM115
+        self.store = BlockStore(store_path)
+
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        document = {
+            "url": chapter.url,
+            "path": chapter.path(),
+            "depth": chapter.current_depth(),
+            "blocks": [self.store.add_block(block) for block in split_blocks(markdown)],
+            "images": self.store.add_images(markdown),
+        }
+        self._file.write(json.dumps(document, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+        self.store.close()
+        ratio = self.store.duplication_ratio()
+        logger.info("Deduplication ratio of %s: %.1f%%", self._path.name, ratio * 100)
+
+
+async def download_images(
+        session: aiohttp.ClientSession, store_path: Path | str, concurrency: int = 4
+) -> int:
+    """Загружает картинки, собранные хранилищем блоков, по одному разу.
+
+    Картинки сохраняются в `images/<hash содержимого><расширение>`, поэтому
+    одинаковые картинки по разным адресам хранятся один раз. Соответствие адресов
+    и файлов дописывается в `images/index.jsonl`, уже загруженные адреса пропускаются.
+
+    :param session: HTTP сессия с cookies авторизации.
+    :param store_path: Директория хранилища блоков.
+    :param concurrency: Максимальное количество одновременных загрузок.
+    :return Количество загруженных картинок.
+    """
+    import aiohttp  # noqa: PLC0415
+
+    store_path = Path(store_path)
+    images_path = store_path / "images"
+    images_path.mkdir(parents=True, exist_ok=True)
+    index_path = images_path / "index.jsonl"
+    downloaded: set[str] = set()
+    if index_path.exists():
+        with index_path.open(encoding="utf-8") as index_file:
+            downloaded = {json.loads(line)["url"] for line in index_file}
+    urls_path = store_path / "images.txt"
+    urls = set(urls_path.read_text(encoding="utf-8").split()) if urls_path.exists() else set()
+    semaphore = asyncio.Semaphore(concurrency)
+    count = 0
+
+    async def download(url: str, index_file: TextIO) -> None:
+        nonlocal count
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            except (aiohttp.ClientError, TimeoutError) as e:
+                logger.warning("Failed to download image %s: %s", url, str(e))
+                return
+        suffix = PurePosixPath(urlparse(url).path).suffix.lower()
+        file_path = images_path / f"{hashlib.sha256(content).hexdigest()}{suffix}"
+        if file_path.exists():
+            metrics.increment("dedup_images_duplicated")
+        else:
+            file_path.write_bytes(content)
+            metrics.increment("bytes_fetched", len(content))
+        index_file.write(json.dumps({"url": url, "file": file_path.name}) + "\n")
+        count += 1
+
+    with index_path.open("a", encoding="utf-8") as index_file:
+        await asyncio.gather(*(download(url, index_file) for url in urls - downloaded))
+    return count
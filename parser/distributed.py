@@ -0,0 +1,224 @@
+"""Распределённый обход: координатор и процессы-обработчики с общей очередью документов.
+
+Координатор раскрывает разделы из `DB_LINKS` в деревья глав и ставит документы
+в очередь, обработчики (каждый со своим авторизованным браузером) берут документы
+в аренду и записывают результаты в собственные файлы. Для обработчиков на нескольких
+хостах достаточно реализовать `WorkQueue` поверх общего хранилища и запустить на
+каждом хосте `process_queue` с этой очередью.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from playwright.async_api import Browser, Playwright, async_playwright
+
+from parser.auth import authenticate
+from parser.browser import launch_browser
+from parser.cache import DocumentIndex
+from parser.constants import DB_LINKS
+from parser.http import create_http_session
+from parser.metrics import metrics
+from parser.modules.db import DocumentLoader, extract_chapter_tree
+from parser.pool import PagePool, RateLimiter
+from parser.retry import retry
+from parser.settings import (
+    get_browser_settings,
+    get_crawl_settings,
+    get_credentials,
+    get_session_settings,
+)
+from parser.sinks import Sink
+from parser.work_queue import SQLiteWorkQueue, WorkItem, WorkQueue
+from parser.worker import crawl_retry_policy, open_sink
+
+logger = logging.getLogger(__name__)
+
+
+async def _launch_authenticated(playwright: Playwright) -> Browser:
+    browser_settings = get_browser_settings()
+    session_settings = get_session_settings()
+    browser = await launch_browser(playwright, browser_settings)
+    return await authenticate(
+        browser,
+        credentials=get_credentials(),
+        state_path=session_settings.state_path,
+        probe_url=session_settings.probe_url,
+        profile=browser_settings,
+    )
+
+
+async def enqueue_db_links(queue: WorkQueue, db_links: tuple[str, ...] = DB_LINKS) -> None:
+    """Раскрывает разделы в деревья глав и ставит их документы в очередь.
+
+    Уже известные очереди документы не добавляются повторно, поэтому
+    для полного повторного обхода нужно начать с новой очереди.
+
+    :param queue: Очередь документов.
+    :param db_links: Ссылки на разделы документации.
+    """
+    retry_policy = crawl_retry_policy()
+    async with async_playwright() as playwright:
+        browser = await _launch_authenticated(playwright)
+        try:
+            for db_link in db_links:
+                chapter_tree = await retry(
+                    partial(
+                        extract_chapter_tree, browser, db_link, get_crawl_settings().toc_max_depth
+                    ),
+                    retry_policy,
+                    description=db_link,
+                )
+                queue.put(
+                    WorkItem.from_chapter(db_link, chapter)
+                    for chapter in chapter_tree.iterate_leaves()
+                )
+                logger.info("Enqueued %s: %s", db_link, queue.counts())
+        finally:
+            await browser.close()
+
+
+async def process_queue(queue: WorkQueue, worker_id: str) -> None:
+    """Обрабатывает документы из очереди, пока в ней есть необработанные документы.
+
+    Документы загружаются параллельно в `CrawlSettings.concurrency` вкладках,
+    конвертация выполняется в текущем процессе, так как обработчиков и так
+    запускается по несколько на хост.
+
+    :param queue: Очередь документов.
+    :param worker_id: Идентификатор обработчика (используется в аренде и именах файлов).
+    """
+    crawl_settings = get_crawl_settings()
+    async with async_playwright() as playwright:
+        browser = await _launch_authenticated(playwright)
+        index = (
+            DocumentIndex(crawl_settings.index_path)
+            if crawl_settings.index_path is not None
+            else None
+        )
+        try:
+            await _consume_queue(queue, worker_id, browser, index)
+        finally:
+            if index is not None:
+                index.close()
+            await browser.close()
+    json_path = crawl_settings.metrics_path
+    prometheus_path = crawl_settings.metrics_prometheus_path
+    metrics.write(
+        json_path and json_path.with_stem(f"{json_path.stem}.{worker_id}"),
+        prometheus_path and prometheus_path.with_stem(f"{prometheus_path.stem}.{worker_id}"),
+    )
+
+
+async def _consume_queue(
+        queue: WorkQueue, worker_id: str, browser: Browser, index: DocumentIndex | None
+) -> None:
+    """Обрабатывает очередь во вкладках авторизованного браузера"""
+    crawl_settings = get_crawl_settings()
+    retry_policy = crawl_retry_policy()
+    session = await create_http_session(browser.contexts[0], limit=crawl_settings.concurrency)
+    with ExitStack() as sinks_stack:
+        sinks: dict[str, Sink] = {}
+
+        def get_sink(db_path: str) -> Sink:
+            if db_path not in sinks:
+                # Очередь не выдаёт завершённые документы повторно, поэтому
+                # перезапущенный обработчик дописывает свои прошлые результаты
+                sinks[db_path] = sinks_stack.enter_context(
+                    open_sink(db_path, worker_id, append=True)
+                )
+            return sinks[db_path]
+
+        async with session, PagePool(browser.contexts[0], crawl_settings.concurrency) as pool:
+            loader = DocumentLoader(
+                pool,
+                rate_limiter=RateLimiter(crawl_settings.rate_limit),
+                session=session,
+                index=index,
+                max_age=crawl_settings.index_max_age,
+            )
+
+            async def consume() -> None:
+                while True:
+                    item = queue.claim(worker_id, crawl_settings.lease_timeout)
+                    if item is None:
+                        # Возвращаем в очередь документы упавших обработчиков
+                        queue.reclaim_expired(crawl_settings.queue_max_attempts)
+                        counts = queue.counts()
+                        if not counts.get("pending") and not counts.get("leased"):
+                            return
+                        # Остальные документы в аренде у других обработчиков
+                        await asyncio.sleep(crawl_settings.queue_poll_interval)
+                        continue
+                    try:
+                        document_content = await retry(
+                            partial(loader.load, item.url),
+                            retry_policy,
+                            description=item.url,
+                        )
+                    except Exception as e:  # noqa: BLE001
+                        logger.error("Failed to parse %s: %s", item.url, e)  # noqa: TRY400
+                        metrics.increment("documents_failed")
+                        queue.fail(
+                            item.url,
+                            f"{type(e).__name__}: {e}",
+                            crawl_settings.queue_max_attempts,
+                        )
+                        continue
+                    with metrics.timer("write"):
+                        get_sink(item.db_path).write(item.chapter(), document_content)
+                    queue.complete(item.url)
+
+            await asyncio.gather(*(consume() for _ in range(crawl_settings.concurrency)))
+
+
+def run_worker(worker_id: str | None = None) -> None:
+    """Точка входа процесса-обработчика с очередью в SQLite"""
+    logging.basicConfig(level=logging.INFO)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    with SQLiteWorkQueue(get_crawl_settings().queue_path) as queue:
+        asyncio.run(process_queue(queue, worker_id))
+
+
+def run_distributed(workers: int | None = None, enqueue: bool = True) -> None:
+    """Запускает координатор и процессы-обработчики на текущем хосте.
+
+    Координатор следит за обработчиками и возвращает в очередь документы,
+    аренда которых истекла (например, после падения обработчика).
+
+    :param workers: Количество процессов-обработчиков (по умолчанию - из настроек).
+    :param enqueue: Поставить документы разделов в очередь перед запуском обработчиков,
+    `False` - продолжить обработку уже заполненной очереди.
+    """
+    crawl_settings = get_crawl_settings()
+    workers = workers or crawl_settings.workers
+    with SQLiteWorkQueue(crawl_settings.queue_path) as queue:
+        if enqueue:
+            asyncio.run(enqueue_db_links(queue))
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(f"{socket.gethostname()}-{number}",),
+                name=f"its-worker-{number}",
+            )
+            for number in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        running = list(processes)
+        while running:
+            time.sleep(crawl_settings.queue_poll_interval)
+            reclaimed = queue.reclaim_expired(crawl_settings.queue_max_attempts)
+            if reclaimed:
+                logger.warning("Reclaimed %d expired leases", reclaimed)
+            for process in [process for process in running if not process.is_alive()]:
+                running.remove(process)
+                if process.exitcode:
+                    logger.error("%s exited with code %s", process.name, process.exitcode)
+        logger.info("Distributed crawl finished: %s", queue.counts())
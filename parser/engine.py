@@ -0,0 +1,257 @@
+"""Общий движок обхода сайтов, подключаемых через адаптеры.
+
+Адаптер описывает только особенности сайта: какие страницы со списками обойти,
+как извлечь из них ссылки на материалы, где на странице материала находится
+контент и каким конвертером его обрабатывать. Пул вкладок, ограничение частоты
+запросов, повторные попытки, кеширование и потоковая выдача результатов
+реализованы в движке один раз.
+"""
+
+from typing import Any, NamedTuple
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator, Iterable
+
+from playwright.async_api import Browser, Page
+
+from .cache import DocumentIndex, hash_content
+from .converter import ConversionStage, ConverterName, convert
+from .datastructures import ChapterNode
+from .metrics import metrics
+from .pool import PagePool, RateLimiter
+from .readiness import goto_ready
+from .retry import RetryPolicy, retry
+from .utils import get_current_context
+
+logger = logging.getLogger(__name__)
+
+# Возвращает внешний HTML первого элемента по селектору
+OUTER_HTML_SCRIPT = "(selector) => document.querySelector(selector)?.outerHTML ?? null"
+
+
+class DetailLink(NamedTuple):
+    url: str                            # Адрес страницы материала
+    title: str                          # Название материала
+    metadata: dict[str, Any] | None = None  # Дополнительные данные из списка (дата, просмотры)
+
+
+class SiteAdapter(ABC):
+    """Описание сайта для общего движка обхода"""
+    # Название источника (корень пути материалов в результатах)
+    name: str
+    # Основной адрес сайта
+    base_url: str
+    # Типы страниц списка и материала (ключи `READINESS_RULES`)
+    listing_page_type: str
+    detail_page_type: str
+    # Селектор контента на странице материала
+    content_selector: str
+    # Конвертер HTML -> Markdown
+    converter: ConverterName = "its"
+
+    @abstractmethod
+    def listings(self) -> Iterable[str]:
+        """Страницы со списками материалов (адреса или ключи для `open_listing`)"""
+
+    async def open_listing(self, page: Page, listing: str) -> None:
+        """Открывает страницу списка и дожидается её готовности"""
+        await goto_ready(page, listing, self.listing_page_type)
+
+    @abstractmethod
+    async def extract_links(self, page: Page) -> list[DetailLink]:
+        """Извлекает ссылки на материалы с открытой страницы списка"""
+
+    async def extract_content(self, page: Page, link: DetailLink) -> str | None:
+        """Открывает страницу материала и возвращает HTML его контента"""
+        await goto_ready(page, link.url, self.detail_page_type)
+        with metrics.timer("html_extraction"):
+            html_content: str | None = await page.evaluate(
+                OUTER_HTML_SCRIPT, self.content_selector
+            )
+        if html_content is not None:
+            metrics.increment("bytes_fetched", len(html_content.encode()))
+        return html_content
+
+    def chapter(self, link: DetailLink) -> ChapterNode:
+        """Глава для записи материала в приёмники документов"""
+        return ChapterNode.from_lineage([(self.name, self.base_url), (link.title, link.url)])
+
+
+class _SiteCrawl:
+    """Состояние одного обхода сайта: очереди ссылок и результатов и их обработчики"""
+
+    def __init__(
+            self,
+            adapter: SiteAdapter,
+            page_pool: PagePool,
+            concurrency: int,
+            rate_limiter: RateLimiter,
+            converter: ConversionStage | None,
+            index: DocumentIndex | None,
+            max_age: float | None,
+            retry_policy: RetryPolicy | None,
+    ) -> None:
+        self._adapter = adapter
+        self._page_pool = page_pool
+        self._concurrency = concurrency
+        self._rate_limiter = rate_limiter
+        self._converter = converter
+        self._index = index
+        self._max_age = max_age
+        self._retry_policy = retry_policy
+        self._links: asyncio.Queue[DetailLink | None] = asyncio.Queue(maxsize=concurrency * 4)
+        self.results: asyncio.Queue[tuple[DetailLink, str] | None] = asyncio.Queue(
+            maxsize=concurrency * 4
+        )
+
+    async def list_links(self, listing: str) -> list[DetailLink]:
+        async def attempt() -> list[DetailLink]:
+            async with self._page_pool.acquire() as page:
+                await self._rate_limiter.wait(self._adapter.base_url)
+                await self._adapter.open_listing(page, listing)
+                return await self._adapter.extract_links(page)
+
+        return await retry(attempt, self._retry_policy, description=listing)
+
+    async def fetch(self, link: DetailLink) -> str | None:
+        async def attempt() -> str | None:
+            async with self._page_pool.acquire() as page:
+                await self._rate_limiter.wait(link.url)
+                return await self._adapter.extract_content(page, link)
+
+        return await retry(attempt, self._retry_policy, description=link.url)
+
+    async def convert(self, html_content: str) -> str:
+        adapter = self._adapter
+        if self._converter is not None:
+            return await self._converter.convert(html_content, adapter.base_url, adapter.converter)
+        return convert(adapter.converter, html_content, adapter.base_url)
+
+    async def load(self, link: DetailLink) -> str | None:
+        """Загружает материал с учётом индекса и конвертирует его в Markdown"""
+        index = self._index
+        record = index.get(link.url) if index is not None else None
+        if (
+                record is not None
+                and self._max_age is not None
+                and time.time() - record["fetched_at"] < self._max_age
+        ):
+            metrics.increment("index_fresh")
+            return record["markdown"]
+        html_content = await self.fetch(link)
+        if html_content is None:
+            return None
+        content_hash = hash_content(html_content)
+        if record is not None and record["content_hash"] == content_hash:
+            metrics.increment("index_unchanged")
+            if index is not None:
+                index.touch(link.url)
+            return record["markdown"]
+        markdown = await self.convert(html_content)
+        metrics.increment("documents_converted")
+        if index is not None:
+            index.put(link.url, content_hash, markdown)
+        return markdown
+
+    async def produce(self) -> None:
+        """Загружает списки параллельно и ставит в очередь ещё не встречавшиеся ссылки"""
+        seen: set[str] = set()
+        tasks = [
+            asyncio.create_task(self.list_links(listing))
+            for listing in self._adapter.listings()
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                try:
+                    listing_links = await completed
+                except Exception as e:  # noqa: BLE001
+                    logger.error("Failed to list %s: %s", self._adapter.name, e)  # noqa: TRY400
+                    continue
+                for link in listing_links:
+                    if link.url not in seen:
+                        seen.add(link.url)
+                        await self._links.put(link)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for _ in range(self._concurrency):
+            await self._links.put(None)
+
+    async def consume(self) -> None:
+        while (link := await self._links.get()) is not None:
+            try:
+                markdown = await self.load(link)
+            except Exception as e:  # noqa: BLE001
+                logger.error("Failed to parse %s: %s", link.url, e)  # noqa: TRY400
+                metrics.increment("documents_failed")
+                continue
+            if markdown is None:
+                logger.warning("No content found at %s", link.url)
+                continue
+            await self.results.put((link, markdown))
+
+    async def run(self) -> None:
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self.produce())
+                for _ in range(self._concurrency):
+                    group.create_task(self.consume())
+        finally:
+            # При досрочном закрытии генератора очередь результатов никто не читает,
+            # поэтому признак окончания отправляется, только если обход не отменён
+            current_task = asyncio.current_task()
+            if current_task is None or not current_task.cancelling():
+                await self.results.put(None)
+
+
+async def crawl_site(
+        browser: Browser,
+        adapter: SiteAdapter,
+        concurrency: int = 4,
+        rate_limit: float | None = None,
+        converter: ConversionStage | None = None,
+        index: DocumentIndex | None = None,
+        max_age: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+) -> AsyncGenerator[tuple[DetailLink, str]]:
+    """Обходит сайт по адаптеру, отдавая материалы по мере готовности.
+
+    Страницы списков загружаются параллельно, материалы - через ограниченный
+    пул вкладок. Материал, встречающийся в нескольких списках, загружается один раз.
+
+    :param browser: Текущий объект браузера.
+    :param adapter: Адаптер сайта.
+    :param concurrency: Максимальное количество одновременно открытых вкладок.
+    :param rate_limit: Максимальное количество запросов в секунду к одному хосту.
+    :param converter: Стадия конвертации в пуле процессов, если не передана -
+    материалы конвертируются в текущем процессе.
+    :param index: Индекс ранее загруженных материалов.
+    :param max_age: Время в секундах, в течение которого материал из индекса
+    считается актуальным без повторной загрузки.
+    :param retry_policy: Политика повторных попыток при временных ошибках.
+    :return: Пары из ссылки на материал и его содержимого в формате Markdown.
+    """
+    context = await get_current_context(browser)
+    async with PagePool(context, size=concurrency) as page_pool:
+        crawl = _SiteCrawl(
+            adapter,
+            page_pool,
+            concurrency,
+            RateLimiter(rate_limit),
+            converter,
+            index,
+            max_age,
+            retry_policy,
+        )
+        runner = asyncio.create_task(crawl.run())
+        try:
+            while (result := await crawl.results.get()) is not None:
+                yield result
+            await runner
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
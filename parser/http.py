@@ -0,0 +1,137 @@
+from typing import NamedTuple
+
+import logging
+import re
+from http.cookies import Morsel
+from urllib.parse import urlparse
+
+import aiohttp
+from playwright.async_api import BrowserContext
+
+from .constants import FRAME_URL_TEMPLATE, LOGIN_URL, USER_AGENT
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Адрес документа в формате: https://its.1c.ru/db/<раздел>#content:<идентификатор>:hdoc
+HDOC_URL_PATTERN = re.compile(r"/db/(?P<db>[^/#?]+)#content:(?P<document_id>[^:/]+):hdoc")
+
+
+def resolve_frame_url(url: str) -> str | None:
+    """Получает адрес содержимого фрейма документа по его адресу из оглавления.
+
+    :param url: URL адрес страницы с документом.
+    :return Адрес содержимого документа или `None`, если адрес имеет неизвестный формат.
+    """
+    match = HDOC_URL_PATTERN.search(url)
+    if match is None:
+        return None
+    parsed_url = urlparse(url)
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    return FRAME_URL_TEMPLATE.format(base_url=base_url, **match.groupdict())
+
+
+async def create_http_session(
+        context: BrowserContext, limit: int = 10, timeout: float = 30
+) -> aiohttp.ClientSession:
+    """Создаёт HTTP сессию с cookies авторизованного контекста браузера.
+
+    :param context: Авторизованный контекст браузера.
+    :param limit: Максимальное количество одновременных соединений.
+    :param timeout: Таймаут запроса в секундах.
+    :return Сессия с пулом соединений.
+    """
+    # Значения cookies отправляются как есть, как их отправил бы браузер:
+    # по умолчанию aiohttp (через SimpleCookie) берёт их в кавычки и экранирует
+    cookie_jar = aiohttp.CookieJar(quote_cookie=False)
+    for cookie in await context.cookies():
+        morsel: Morsel[str] = Morsel()
+        morsel.set(cookie["name"], cookie["value"], cookie["value"])
+        morsel["domain"] = cookie["domain"]
+        morsel["path"] = cookie["path"]
+        cookie_jar.update_cookies({cookie["name"]: morsel})
+    return aiohttp.ClientSession(
+        cookie_jar=cookie_jar,
+        connector=aiohttp.TCPConnector(limit=limit),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+class FetchedDocument(NamedTuple):
+    html: str                       # HTML содержимое (пустое, если документ не изменился)
+    etag: str | None                # Заголовок ETag ответа
+    last_modified: str | None       # Заголовок Last-Modified ответа
+    not_modified: bool = False      # Сервер ответил, что документ не изменился
+
+
+async def fetch_document(
+        session: aiohttp.ClientSession,
+        url: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+) -> FetchedDocument | None:
+    """Загружает документ без браузера с помощью условного запроса.
+
+    :param session: HTTP сессия с cookies авторизации.
+    :param url: URL адрес страницы с документом.
+    :param etag: ETag ранее загруженной версии документа.
+    :param last_modified: Last-Modified ранее загруженной версии документа.
+    :return Загруженный документ или `None`, если загрузить его не удалось.
+    """
+    frame_url = resolve_frame_url(url)
+    if frame_url is None:
+        return None
+    headers: dict[str, str] = {}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if last_modified is not None:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        with metrics.timer("http_fetch"):
+            return await _get_document(session, url, frame_url, headers, etag, last_modified)
+    except (aiohttp.ClientError, TimeoutError) as e:
+        metrics.increment("http_failures")
+        logger.warning("Failed to fetch document %s: %s", url, str(e))
+        return None
+
+
+async def _get_document(
+        session: aiohttp.ClientSession,
+        url: str,
+        frame_url: str,
+        headers: dict[str, str],
+        etag: str | None,
+        last_modified: str | None,
+) -> FetchedDocument | None:
+    async with session.get(frame_url, headers=headers) as response:
+        if response.status == 304:
+            metrics.increment("http_not_modified")
+            return FetchedDocument(
+                html="",
+                etag=response.headers.get("ETag", etag),
+                last_modified=response.headers.get("Last-Modified", last_modified),
+                not_modified=True,
+            )
+        if response.status != 200 or response.url.host == urlparse(LOGIN_URL).netloc:
+            metrics.increment("http_failures")
+            logger.warning("Failed to fetch document %s: status %s", url, response.status)
+            return None
+        html_content = await response.text()
+        metrics.increment("bytes_fetched", len(html_content.encode()))
+        return FetchedDocument(
+            html=html_content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+
+async def fetch_document_html(session: aiohttp.ClientSession, url: str) -> str | None:
+    """Загружает HTML содержимое документа без браузера.
+
+    :param session: HTTP сессия с cookies авторизации.
+    :param url: URL адрес страницы с документом.
+    :return HTML содержимое документа или `None`, если загрузить его не удалось.
+    """
+    document = await fetch_document(session, url)
+    return document.html if document is not None else None
@@ -0,0 +1,93 @@
+from typing import Literal
+
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+# Состояние документа в журнале обхода
+CrawlState = Literal["pending", "done", "failed"]
+
+
+class CrawlJournal:
+    """Журнал обхода в SQLite.
+
+    Для каждого документа хранит состояние, количество попыток и последнюю ошибку,
+    поэтому прерванный обход можно продолжить с места остановки,
+    а документы, загрузка которых не удалась, - перезагрузить отдельно.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                url TEXT PRIMARY KEY,
+                db_path TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS journal_db_path_state ON journal (db_path, state)"
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def register(self, db_path: str, urls: Iterable[str]) -> None:
+        """Добавляет документы раздела в журнал, не изменяя состояние уже известных"""
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO journal (url, db_path, updated_at) VALUES (?, ?, ?)",
+            ((url, db_path, now) for url in urls),
+        )
+        self._connection.commit()
+
+    def reset(self, db_path: str) -> None:
+        """Удаляет из журнала все документы раздела, чтобы начать его обход заново"""
+        self._connection.execute("DELETE FROM journal WHERE db_path = ?", (db_path,))
+        self._connection.commit()
+
+    def urls(self, db_path: str, state: CrawlState) -> set[str]:
+        """Получает адреса документов раздела в указанном состоянии"""
+        rows = self._connection.execute(
+            "SELECT url FROM journal WHERE db_path = ? AND state = ?", (db_path, state)
+        )
+        return {url for url, in rows}
+
+    def counts(self, db_path: str) -> dict[CrawlState, int]:
+        """Количество документов раздела в каждом состоянии"""
+        rows = self._connection.execute(
+            "SELECT state, COUNT(*) FROM journal WHERE db_path = ? GROUP BY state", (db_path,)
+        )
+        return dict(rows.fetchall())
+
+    def mark_done(self, url: str) -> None:
+        """Отмечает документ как успешно загруженный"""
+        self._connection.execute(
+            "UPDATE journal SET state = 'done', attempts = attempts + 1, last_error = NULL, "
+            "updated_at = ? WHERE url = ?",
+            (time.time(), url),
+        )
+        self._connection.commit()
+
+    def mark_failed(self, url: str, error: str) -> None:
+        """Отмечает документ как не загруженный после всех попыток"""
+        self._connection.execute(
+            "UPDATE journal SET state = 'failed', attempts = attempts + 1, last_error = ?, "
+            "updated_at = ? WHERE url = ?",
+            (error, time.time(), url),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,183 @@
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Границы корзин гистограмм задержек в секундах
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+)
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными корзинами"""
+    __slots__ = ("buckets", "count", "counts", "max", "min", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        # Последняя корзина - значения больше верхней границы (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Метрики обхода: задержки по стадиям, счётчики и текущие значения.
+
+    Стадии: navigation, selector_wait, html_extraction, http_fetch,
+    html_transform, markdown_convert, links_filter, write.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Увеличивает счётчик"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_gauge(self, name: str, delta: float) -> None:
+        """Изменяет текущее значение (например количество вкладок в работе) и его пик"""
+        value = self.gauges[name] = self.gauges.get(name, 0) + delta
+        peak_name = f"{name}_peak"
+        self.gauges[peak_name] = max(self.gauges.get(peak_name, 0), value)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Записывает длительность стадии"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Измеряет длительность стадии (в том числе вокруг `await`)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def in_flight(self, name: str) -> Iterator[None]:
+        """Учитывает количество одновременно выполняющихся операций"""
+        self.add_gauge(name, 1)
+        try:
+            yield
+        finally:
+            self.add_gauge(name, -1)
+
+    def merge(self, other: "Metrics") -> None:
+        """Добавляет метрики, собранные в другом процессе"""
+        for name, value in other.counters.items():
+            self.increment(name, value)
+        for stage, histogram in other.histograms.items():
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram(histogram.buckets)
+            self.histograms[stage].merge(histogram)
+
+    def pop(self) -> "Metrics":
+        """Возвращает накопленные метрики и начинает сбор заново"""
+        snapshot = Metrics()
+        snapshot.counters, snapshot.histograms = self.counters, self.histograms
+        self.counters, self.histograms = {}, {}
+        return snapshot
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "elapsed": round(time.time() - self.started_at, 3),
+            "counters": dict(sorted(self.counters.items())),
+            "gauges": dict(sorted(self.gauges.items())),
+            "stages": {
+                stage: histogram.to_dict()
+                for stage, histogram in sorted(self.histograms.items())
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = "its_parser") -> str:
+        """Выгружает метрики в текстовом формате Prometheus"""
+        lines: list[str] = []
+        for name, value in sorted(self.counters.items()):
+            lines.extend((
+                f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"
+            ))
+        for name, value in sorted(self.gauges.items()):
+            lines.extend((f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"))
+        metric = f"{prefix}_stage_seconds"
+        if self.histograms:
+            lines.append(f"# TYPE {metric} histogram")
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(
+                (*histogram.buckets, "+Inf"), histogram.counts, strict=True
+            ):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.extend((
+                f'{metric}_sum{{stage="{stage}"}} {histogram.sum}',
+                f'{metric}_count{{stage="{stage}"}} {histogram.count}',
+            ))
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Path | None = None, prometheus_path: Path | None = None) -> None:
+        """Записывает итоговую сводку в JSON и/или в формате Prometheus"""
+        if json_path is not None:
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            json_path.write_text(self.to_json(), encoding="utf-8")
+        if prometheus_path is not None:
+            prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+            prometheus_path.write_text(self.to_prometheus(), encoding="utf-8")
+
+
+# Метрики текущего процесса
+metrics = Metrics()
@@ -1,83 +1,390 @@
-from playwright.async_api import Browser, ElementHandle
+from __future__ import annotations
 
+from typing import TypedDict
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+
+import aiohttp
+from playwright.async_api import Browser, Page
+
+from ..cache import DocumentIndex, hash_content
 from ..constants import URL
+from ..converter import ConversionStage
 from ..datastructures import ChapterNode
-from ..utils import get_current_page, html2md_pipeline
+from ..http import FetchedDocument, fetch_document, fetch_document_html
+from ..journal import CrawlJournal
+from ..metrics import metrics
+from ..pool import PagePool, RateLimiter
+from ..readiness import goto_ready
+from ..retry import RetryPolicy, retry
+from ..utils import get_current_context, get_current_page, html2md_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Сериализует всё дерево оглавления за один вызов `page.evaluate`.
+# Учитываются только прямые наследники `<ul>` и `<li>`, чтобы вложенные главы не дублировались.
+TOC_SCRIPT = """(toc, maxDepth) => {
+    const collect = (ul, depth) => {
+        if (!ul || depth > maxDepth) return [];
+        const items = [];
+        for (const li of ul.querySelectorAll(':scope > li')) {
+            const link = li.querySelector(':scope > a');
+            items.push({
+                name: link?.textContent ?? '',
+                href: link?.getAttribute('href') ?? null,
+                children: collect(li.querySelector(':scope > ul'), depth + 1),
+            });
+        }
+        return items;
+    };
+    return collect(toc.querySelector('ul'), 0);
+}"""
+
+
+class TocItem(TypedDict):
+    name: str                   # Название главы
+    href: str | None            # Относительная ссылка на главу (нет у групп без страницы)
+    children: list[TocItem]     # Вложенные главы
+
+
+def build_chapter_tree(
+        items: list[TocItem], root_node: ChapterNode, base_url: str = URL
+) -> ChapterNode:
+    """Строит дерево глав из сериализованного оглавления.
+
+    Элементы без ссылки не становятся главами, их вложенные главы добавляются
+    к ближайшей главе выше.
+
+    :param items: Сериализованное оглавление (результат `TOC_SCRIPT`).
+    :param root_node: Корневой узел, к которому добавляются главы.
+    :param base_url: Основной адрес сайта.
+    :return Корневой узел с вложенными в него главами.
+    """
+    stack: list[tuple[ChapterNode, list[TocItem]]] = [(root_node, items)]
+    while stack:
+        node, children = stack.pop()
+        for item in _page_items(children):
+            child_node = ChapterNode(name=item["name"], url=f"{base_url}{item['href']}")
+            node.add_child(child_node)
+            stack.append((child_node, item["children"]))
+    return root_node
+
 
+def _page_items(items: list[TocItem]) -> Iterator[TocItem]:
+    """Элементы оглавления со ссылками, вместо элементов без ссылки - их вложенные элементы"""
+    for item in items:
+        if item["href"]:
+            yield item
+        else:
+            yield from _page_items(item["children"])
 
-async def extract_chapter_tree(browser: Browser, root_path: str) -> ChapterNode:
+
+async def extract_chapter_tree(
+        browser: Browser, root_path: str, max_depth: int = 5, base_url: str = URL
+) -> ChapterNode:
     """Получает дерево навигации по главам в документации
 
     :param browser: Объект браузера.
     :param root_path: Основной путь до нужного раздела с документацией.
+    :param max_depth: Максимальная глубина вложенности глав.
+    :param base_url: Основной адрес сайта.
     :return Дерево с вложенными в него главами и разделами.
     """
-    url = f"{URL}{root_path}"
+    url = f"{base_url}{root_path}"
     root_node = ChapterNode(name="Root", url=url)
     page = await get_current_page(browser)
-    await page.goto(url)
-    div_element = await page.wait_for_selector("#w_metadata_toc")
-    ul_element = await div_element.query_selector("ul")
-    li_element = await ul_element.query_selector("li")
-    await extract_nested_chapters(li_element, root_node)
-    return root_node
+    await goto_ready(page, url, "its_toc")
+    items: list[TocItem] = await page.eval_on_selector("#w_metadata_toc", TOC_SCRIPT, max_depth)
+    return build_chapter_tree(items, root_node, base_url)
 
 
-async def extract_nested_chapters(
-        li_element: ElementHandle,
-        node: ChapterNode,
-        current_depth: int = 0,
-        max_depth: int = 5
-) -> None:
-    """Рекурсивно находит вложенные главы.
+async def load_document_html(page: Page, url: str) -> str:
+    """Загружает HTML содержимое документа из фрейма на странице.
 
-    :param li_element: Элемент содержащий главу.
-    :param node: Текущий узел дерева (текущая глава).
-    :param current_depth: Текущая глубина рекурсии.
-    :param max_depth: Максимальная глубина рекурсии.
+    :param page: Вкладка браузера, в которой открывается документ.
+    :param url: URL адрес страницы с документом.
+    :return HTML содержимое документа.
     """
-    if current_depth > max_depth:
-        return
-    link_element = await li_element.query_selector("a")
-    child_node = ChapterNode(
-        name=await link_element.text_content(),
-        url=f"{URL}{await link_element.get_attribute("href")}",
-    )
-    node.add_child(child_node)
-    ul_element = await li_element.query_selector("ul")
-    if not ul_element:
-        return
-    li_elements = await ul_element.query_selector_all("li")
-    for li_element in li_elements:
-        await extract_nested_chapters(li_element, child_node, current_depth + 1, max_depth)
+    await goto_ready(page, url, "its_document")
+    with metrics.timer("html_extraction"):
+        frame_content = page.frame_locator("#w_metadata_doc_frame")
+        await frame_content.locator("body").wait_for()
+        html_content = await frame_content.locator("body").inner_html()
+    metrics.increment("bytes_fetched", len(html_content.encode()))
+    return html_content
 
 
-async def parse_document_content(browser: Browser, url: str) -> str:
+async def parse_document_content(
+        browser: Browser, url: str, session: aiohttp.ClientSession | None = None
+) -> str:
     """Парсит текстовый контент документа в формате Markdown
 
     :param browser: Текущий объект браузера.
     :param url: URL адрес страницы с документом.
+    :param session: HTTP сессия с cookies авторизации, если передана - документ
+    сначала загружается напрямую без браузера.
     :return Содержимое документа в формате Markdown.
     """
-    page = await get_current_page(browser)
-    await page.goto(url)
-    await page.wait_for_selector("#w_metadata_doc_frame")
-    frame_content = page.frame_locator("#w_metadata_doc_frame")
-    await frame_content.locator("body").wait_for()
-    html_content = await frame_content.locator("body").inner_html()
+    html_content = await fetch_document_html(session, url) if session is not None else None
+    if html_content is None:
+        page = await get_current_page(browser)
+        html_content = await load_document_html(page, url)
     return html2md_pipeline(html_content, URL)
 
 
-async def parse_db(browser: Browser, db_path: str) -> list[str]:
+class DocumentLoader:
+    """Загружает документы раздела и конвертирует их в Markdown.
+
+    Документ сначала загружается по HTTP (если передана сессия), при ошибке -
+    через вкладку из пула. Если передан индекс, неизменившиеся документы
+    берутся из него без повторной конвертации.
+
+    :param page_pool: Пул вкладок авторизованного контекста браузера.
+    :param rate_limiter: Ограничитель частоты запросов к хосту.
+    :param session: HTTP сессия с cookies авторизации.
+    :param converter: Стадия конвертации в пуле процессов.
+    :param index: Индекс ранее загруженных документов.
+    :param max_age: Документы, загруженные не раньше указанного количества секунд
+    назад, берутся из индекса без запроса к серверу.
+    """
+
+    def __init__(
+            self,
+            page_pool: PagePool,
+            rate_limiter: RateLimiter | None = None,
+            session: aiohttp.ClientSession | None = None,
+            converter: ConversionStage | None = None,
+            index: DocumentIndex | None = None,
+            max_age: float | None = None,
+    ) -> None:
+        self._page_pool = page_pool
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self._session = session
+        self._converter = converter
+        self._index = index
+        self._max_age = max_age
+
+    async def load(self, url: str) -> str:
+        """Загружает документ и возвращает его содержимое в формате Markdown"""
+        record = self._index.get(url) if self._index is not None else None
+        if (
+                record is not None
+                and self._max_age is not None
+                and time.time() - record["fetched_at"] < self._max_age
+        ):
+            metrics.increment("index_fresh")
+            return record["markdown"]
+        await self._rate_limiter.wait(url)
+        document = None
+        if self._session is not None:
+            document = await fetch_document(
+                self._session,
+                url,
+                etag=record["etag"] if record is not None else None,
+                last_modified=record["last_modified"] if record is not None else None,
+            )
+        if document is not None and document.not_modified and record is not None:
+            self._touch(url, document)
+            return record["markdown"]
+        if document is None or document.not_modified:
+            metrics.increment("browser_fallbacks")
+            async with self._page_pool.acquire() as page:
+                html_content = await load_document_html(page, url)
+            document = FetchedDocument(html=html_content, etag=None, last_modified=None)
+        content_hash = hash_content(document.html)
+        if record is not None and record["content_hash"] == content_hash:
+            metrics.increment("index_unchanged")
+            self._touch(url, document)
+            return record["markdown"]
+        markdown = await self._convert(document.html)
+        metrics.increment("documents_converted")
+        if self._index is not None:
+            self._index.put(url, content_hash, markdown, document.etag, document.last_modified)
+        return markdown
+
+    def _touch(self, url: str, document: FetchedDocument) -> None:
+        if self._index is not None:
+            self._index.touch(url, document.etag, document.last_modified)
+
+    async def _convert(self, html_content: str) -> str:
+        if self._converter is not None:
+            return await self._converter.convert(html_content, URL)
+        return html2md_pipeline(html_content, URL)
+
+
+async def iterate_db(
+        browser: Browser,
+        db_path: str,
+        concurrency: int = 1,
+        rate_limit: float | None = None,
+        max_depth: int = 5,
+        session: aiohttp.ClientSession | None = None,
+        converter: ConversionStage | None = None,
+        index: DocumentIndex | None = None,
+        max_age: float | None = None,
+        ordered: bool = False,
+        journal: CrawlJournal | None = None,
+        resume: bool = False,
+        retry_policy: RetryPolicy | None = None,
+) -> AsyncIterator[tuple[ChapterNode, str]]:
+    """Выполняет парсинг заданного раздела документации, отдавая документы по мере готовности.
+
+    Одновременно в работе находится ограниченное количество документов,
+    поэтому потребление памяти не зависит от размера раздела. Временные ошибки
+    загрузки повторяются с экспоненциальной задержкой, а документ, который так и
+    не удалось загрузить, пропускается (и отмечается в журнале), не прерывая обход раздела.
+
+    :param browser: Текущий объект браузера.
+    :param db_path: Ссылка на документацию.
+    :param concurrency: Максимальное количество одновременно открытых вкладок.
+    :param rate_limit: Максимальное количество запросов в секунду к одному хосту.
+    :param max_depth: Максимальная глубина вложенности глав.
+    :param session: HTTP сессия с cookies авторизации.
+    :param converter: Стадия конвертации в пуле процессов.
+    :param index: Индекс ранее загруженных документов для инкрементального обхода.
+    :param max_age: Время в секундах, в течение которого документ из индекса
+    считается актуальным без запроса к серверу.
+    :param ordered: Отдавать документы в порядке следования глав.
+    :param journal: Журнал обхода для отслеживания состояния документов.
+    :param resume: Продолжить прерванный обход, пропустив уже загруженные по журналу документы.
+    :param retry_policy: Политика повторных попыток при временных ошибках.
+    :return: Пары из главы и её содержимого в формате Markdown.
+    """
+    chapter_tree = await retry(
+        lambda: extract_chapter_tree(browser, db_path, max_depth),
+        retry_policy,
+        description=db_path,
+    )
+    context = await get_current_context(browser)
+    chapters = list(chapter_tree.iterate_leaves())
+    done_urls: set[str] = set()
+    if journal is not None:
+        if resume:
+            done_urls = journal.urls(db_path, "done")
+        else:
+            journal.reset(db_path)
+        journal.register(db_path, (chapter.url for chapter in chapters))
+
+    async with PagePool(context, size=concurrency) as page_pool:
+        loader = DocumentLoader(
+            page_pool,
+            rate_limiter=RateLimiter(rate_limit),
+            session=session,
+            converter=converter,
+            index=index,
+            max_age=max_age,
+        )
+
+        async def parse_chapter(chapter: ChapterNode) -> tuple[ChapterNode, str] | None:
+            try:
+                document_content = await retry(
+                    lambda: loader.load(chapter.url), retry_policy, description=chapter.url
+                )
+            except Exception as e:  # noqa: BLE001
+                logger.error("Failed to parse %s: %s", chapter.url, e)  # noqa: TRY400
+                metrics.increment("documents_failed")
+                if journal is not None:
+                    journal.mark_failed(chapter.url, f"{type(e).__name__}: {e}")
+                return None
+            return chapter, document_content
+
+        # Документы загружаются с небольшим запасом, чтобы не простаивала конвертация
+        window = concurrency * 4
+        pending: deque[asyncio.Task[tuple[ChapterNode, str] | None]] = deque()
+        try:
+            for chapter in chapters:
+                if chapter.url in done_urls:
+                    metrics.increment("documents_skipped")
+                    continue
+                pending.append(asyncio.create_task(parse_chapter(chapter)))
+                if len(pending) < window:
+                    continue
+                async for result in _drain(pending, ordered, keep=window - 1, journal=journal):
+                    yield result
+            async for result in _drain(pending, ordered, keep=0, journal=journal):
+                yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _drain(
+        pending: deque[asyncio.Task[tuple[ChapterNode, str] | None]],
+        ordered: bool,
+        keep: int,
+        journal: CrawlJournal | None = None,
+) -> AsyncIterator[tuple[ChapterNode, str]]:
+    """Отдаёт результаты завершённых задач, пока в работе не останется `keep` задач.
+
+    Документ отмечается в журнале загруженным до передачи потребителю, поэтому
+    документ, на котором потребитель остановил обход, не отдаётся повторно при продолжении.
+    """
+    while len(pending) > keep:
+        if ordered:
+            results = [await pending[0]]
+            pending.popleft()
+        else:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            results = []
+            for task in done:
+                pending.remove(task)
+                results.append(task.result())
+        for result in results:
+            if result is None:
+                continue
+            if journal is not None:
+                journal.mark_done(result[0].url)
+            yield result
+
+
+async def parse_db(
+        browser: Browser,
+        db_path: str,
+        concurrency: int = 1,
+        rate_limit: float | None = None,
+        max_depth: int = 5,
+        session: aiohttp.ClientSession | None = None,
+        converter: ConversionStage | None = None,
+        index: DocumentIndex | None = None,
+        max_age: float | None = None,
+) -> list[str]:
     """Выполняет парсинг заданного раздела документации.
 
+    Документы загружаются параллельно в нескольких вкладках одного
+    авторизованного контекста браузера. Если передана HTTP сессия, документы
+    сначала загружаются напрямую, а браузер используется только при ошибке.
+    Для больших разделов лучше использовать `iterate_db`.
+
     :param browser: Текущий объект браузера.
     :param db_path: Ссылка на документацию.
-    :return: Массив из полученных страниц в формате Markdown.
+    :param concurrency: Максимальное количество одновременно открытых вкладок.
+    :param rate_limit: Максимальное количество запросов в секунду к одному хосту.
+    :param max_depth: Максимальная глубина вложенности глав.
+    :param session: HTTP сессия с cookies авторизации.
+    :param converter: Стадия конвертации в пуле процессов, если не передана -
+    документы конвертируются в текущем процессе.
+    :param index: Индекс ранее загруженных документов для инкрементального обхода.
+    :param max_age: Время в секундах, в течение которого документ из индекса
+    считается актуальным без запроса к серверу.
+    :return: Массив из полученных страниц в формате Markdown (в порядке следования глав).
     """
-    documents: list[str] = []
-    chapter_tree = await extract_chapter_tree(browser, db_path)
-    for chapter in chapter_tree.iterate_leaves():
-        document_content = await parse_document_content(browser, chapter.url)
-        documents.append(f"{chapter.path()}\n\n{document_content}")
-    return documents
+    return [
+        f"{chapter.path()}\n\n{document_content}"
+        async for chapter, document_content in iterate_db(
+            browser,
+            db_path,
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            max_depth=max_depth,
+            session=session,
+            converter=converter,
+            index=index,
+            max_age=max_age,
+            ordered=True,
+        )
+    ]
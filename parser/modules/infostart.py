@@ -0,0 +1,53 @@
+from collections.abc import Iterator
+from urllib.parse import urljoin
+
+from playwright.async_api import Page
+
+from ..constants import INFOSTART_URL
+from ..converter import ConverterName
+from ..engine import DetailLink, SiteAdapter
+from ..metrics import metrics
+
+# Извлекает ссылки на публикации со страницы списка за один вызов `page.evaluate`
+PUBLICATIONS_SCRIPT = """() => Array.from(
+    document.querySelectorAll('.publication-item .publication-name a.font-md'),
+    (link) => ({ title: link.textContent.trim(), href: link.getAttribute('href') }),
+)"""
+
+
+class InfostartAdapter(SiteAdapter):
+    """Публикации раздела infostart.
+
+    :param section_path: Путь до раздела с публикациями.
+    :param pages: Количество страниц списка публикаций.
+    :param base_url: Основной адрес сайта.
+    """
+    name = "infostart"
+    listing_page_type = "infostart_listing"
+    detail_page_type = "infostart_publication"
+    content_selector = ".center-side-wrap"
+    converter: ConverterName = "html_to_markdown"
+
+    def __init__(
+            self, section_path: str = "/1c/", pages: int = 1, base_url: str = INFOSTART_URL
+    ) -> None:
+        self.base_url = base_url
+        self._section_path = section_path
+        self._pages = pages
+
+    def listings(self) -> Iterator[str]:
+        yield f"{self.base_url}{self._section_path}"
+        # Постраничная навигация Bitrix
+        for page_number in range(2, self._pages + 1):
+            yield f"{self.base_url}{self._section_path}?PAGEN_1={page_number}"
+
+    async def extract_links(self, page: Page) -> list[DetailLink]:
+        with metrics.timer("html_extraction"):
+            publications: list[dict[str, str | None]] = await page.evaluate(PUBLICATIONS_SCRIPT)
+        return [
+            DetailLink(
+                url=urljoin(self.base_url, publication["href"]), title=publication["title"] or ""
+            )
+            for publication in publications
+            if publication["href"]
+        ]
@@ -0,0 +1,211 @@
+from typing import TypedDict
+
+import logging
+import time
+from collections.abc import Iterator
+from datetime import datetime
+
+from playwright.async_api import Browser, Page
+
+from ..constants import NEWS_URL, URL
+from ..converter import ConverterName
+from ..engine import DetailLink, SiteAdapter
+from ..metrics import metrics
+from ..readiness import READINESS_RULES, ReadinessRule, goto_ready
+from ..utils import get_current_page
+
+logger = logging.getLogger(__name__)
+
+MONTHS: dict[str, str] = {
+    "янв": "января",
+    "фев": "февраля",
+    "мар": "марта",
+    "апр": "апреля",
+    "май": "мая",
+    "июн": "июня",
+    "июл": "июля",
+    "авг": "августа",
+    "сен": "сентября",
+    "окт": "октября",
+    "ноя": "ноября",
+    "дек": "декабря"
+}
+
+
+class NewsElement(TypedDict):
+    title: str      # Заголовок новости
+    url: str        # Адрес для перехода на полную новость
+    date: str       # Дата публикации
+    views: int      # Количество просмотров
+
+
+def format_period_value(date: datetime) -> str:
+    if date.month > 9:
+        return f"{date.year}{date.month}"
+    return f"{date.year}{date.month:02}"
+
+
+# Помечает текущий список новостей устаревшим и выбирает период в фильтре
+SELECT_PERIOD_SCRIPT = """([periodValue, selector]) => {
+    for (const element of document.querySelector(selector)?.children ?? []) {
+        element.dataset.stalePeriod = '';
+    }
+    const select = document.getElementById('news_filter_period');
+    select.value = periodValue;
+    select.dispatchEvent(new Event('change', { bubbles: true }));
+}"""
+# Список обновлён, когда в нём не осталось элементов прошлого периода
+PERIOD_RENDERED_SCRIPT = "(selector) => !document.querySelector(`${selector} [data-stale-period]`)"
+
+
+async def set_period_value(
+        page: Page, period_value: str, rule: ReadinessRule | None = None
+) -> None:
+    """Выбирает период в фильтре новостей и дожидается обновления списка.
+
+    Период выбирается всегда, даже если он уже выбран: список периода по умолчанию
+    тоже подгружается XHR запросом и мог ещё не загрузиться. Готовность - ответ
+    на запрос списка и замена элементов списка прошлого периода.
+
+    :param page: Вкладка со страницей новостей.
+    :param period_value: Значение периода в формате 'YYYYMM'.
+    :param rule: Условие готовности, если отличается от `READINESS_RULES["news_period"]`.
+    """
+    rule = rule or READINESS_RULES["news_period"]
+    selector = rule.selector or "#news_content"
+    pattern = rule.response_pattern or ""
+    started = time.perf_counter()
+    async with page.expect_response(
+        lambda response: (
+            pattern in response.url and response.request.resource_type in {"xhr", "fetch"}
+        ),
+        timeout=rule.timeout,
+    ) as response_info:
+        await page.evaluate(SELECT_PERIOD_SCRIPT, [period_value, selector])
+    response = await response_info.value
+    await response.finished()
+    responded = time.perf_counter()
+    metrics.observe("response_wait", responded - started)
+    await page.wait_for_function(PERIOD_RENDERED_SCRIPT, arg=selector, timeout=rule.timeout)
+    metrics.observe("selector_wait", time.perf_counter() - responded)
+    logger.debug("news period %s ready in %.3fs", period_value, time.perf_counter() - started)
+
+
+# Извлекает весь список новостей за один вызов `page.evaluate`
+NEWS_LISTING_SCRIPT = """(MONTHS) => Array.from(
+    document.querySelectorAll('#news_content .panel'),
+    (element) => {
+        const text = (selector) => element.querySelector(selector)?.textContent ?? null;
+        const dateEl = element.querySelector('.journal-date');
+        let date = '_';
+        if (dateEl) {
+            const day = dateEl.querySelector('.journal-date__day')?.textContent || '';
+            const month = dateEl.querySelector('.journal-date__month')?.textContent || '';
+            const year = dateEl.querySelector('.journal-date__year')?.textContent || '';
+            date = `${day} ${MONTHS[month] || month} 20${year.replace("'", "")}`;
+        }
+        return {
+            url: element.querySelector('a[href]')?.getAttribute('href') ?? null,
+            title: text('.link-item.news-item'),
+            date: date,
+            views: text('.logo.view'),
+        };
+    },
+)"""
+
+
+class RawNewsElement(TypedDict):
+    url: str | None
+    title: str | None
+    date: str
+    views: str | None
+
+
+def build_news_elements(raw_elements: list[RawNewsElement]) -> list[NewsElement]:
+    """Приводит извлечённые со страницы данные к списку новостей"""
+    from html2text import html2text  # noqa: PLC0415
+
+    news_elements: list[NewsElement] = []
+    for raw_element in raw_elements:
+        url = raw_element["url"]
+        if url is None:
+            continue
+        if not url.startswith("http"):
+            url = f"{URL}{url}"
+        title = raw_element["title"]
+        views = (raw_element["views"] or "").strip()
+        news_elements.append(NewsElement(
+            title=html2text(title.strip()) if title is not None else "_",
+            url=url,
+            date=raw_element["date"],
+            views=int(views) if views.isdigit() else 0,
+        ))
+    return news_elements
+
+
+async def extract_news_elements(page: Page) -> list[NewsElement]:
+    """Извлекает список новостей с открытой страницы новостей"""
+    with metrics.timer("html_extraction"):
+        raw_elements: list[RawNewsElement] = await page.evaluate(NEWS_LISTING_SCRIPT, MONTHS)
+    return build_news_elements(raw_elements)
+
+
+async def list_news(page: Page, date: datetime, news_url: str = NEWS_URL) -> list[NewsElement]:
+    """Получает список новостей за месяц на переданной вкладке"""
+    await goto_ready(page, news_url, "news_listing")
+    await set_period_value(page, format_period_value(date))
+    return await extract_news_elements(page)
+
+
+async def find_news(
+        browser: Browser, date: datetime, news_url: str = NEWS_URL
+) -> list[NewsElement]:
+    return await list_news(await get_current_page(browser), date, news_url)
+
+
+def iterate_months(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Итерация по месяцам в диапазоне дат (включительно)"""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield datetime(year, month, 1)  # noqa: DTZ001
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class NewsAdapter(SiteAdapter):
+    """Новости ИТС за диапазон месяцев.
+
+    Списки новостей за месяц подгружаются после выбора периода в фильтре,
+    поэтому страницами списков служат значения периода в формате 'YYYYMM'.
+
+    :param start: Первый месяц диапазона.
+    :param end: Последний месяц диапазона.
+    :param news_url: Адрес страницы новостей.
+    """
+    name = "news"
+    base_url = URL
+    listing_page_type = "news_listing"
+    detail_page_type = "news_article"
+    content_selector = "#content"
+    converter: ConverterName = "html2text"
+
+    def __init__(self, start: datetime, end: datetime, news_url: str = NEWS_URL) -> None:
+        self._start = start
+        self._end = end
+        self._news_url = news_url
+
+    def listings(self) -> Iterator[str]:
+        return (format_period_value(date) for date in iterate_months(self._start, self._end))
+
+    async def open_listing(self, page: Page, listing: str) -> None:
+        await goto_ready(page, self._news_url, self.listing_page_type)
+        await set_period_value(page, listing)
+
+    async def extract_links(self, page: Page) -> list[DetailLink]:
+        return [
+            DetailLink(
+                url=element["url"],
+                title=element["title"],
+                metadata={"date": element["date"], "views": element["views"]},
+            )
+            for element in await extract_news_elements(page)
+        ]
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page
+
+from .metrics import metrics
+
+
+class PagePool:
+    """Ограниченный пул вкладок внутри одного (авторизованного) контекста браузера.
+
+    Вкладки создаются лениво по мере необходимости и переиспользуются,
+    одновременно открыто не более `size` вкладок.
+    """
+
+    def __init__(self, context: BrowserContext, size: int = 1) -> None:
+        if size < 1:
+            raise ValueError("Page pool size must be positive")
+        self._context = context
+        self._size = size
+        self._pages: list[Page] = []
+        self._idle: asyncio.Queue[Page] = asyncio.Queue()
+        self._lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def __aenter__(self) -> "PagePool":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
+
+    async def _get_page(self) -> Page:
+        async with self._lock:
+            if self._idle.empty() and len(self._pages) < self._size:
+                page = await self._context.new_page()
+                self._pages.append(page)
+                return page
+        return await self._idle.get()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Page]:
+        """Берёт свободную вкладку из пула и возвращает её обратно после использования"""
+        page = await self._get_page()
+        try:
+            with metrics.in_flight("pages_in_flight"):
+                yield page
+        finally:
+            self._idle.put_nowait(page)
+
+    async def close(self) -> None:
+        """Закрывает все созданные пулом вкладки"""
+        for page in self._pages:
+            if not page.is_closed():
+                await page.close()
+        self._pages.clear()
+        self._idle = asyncio.Queue()
+
+
+class RateLimiter:
+    """Ограничивает частоту запросов к каждому хосту.
+
+    :param rate: Максимальное количество запросов в секунду к одному хосту,
+    `None` - без ограничений.
+    """
+
+    def __init__(self, rate: float | None = None) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate limit must be positive")
+        self._interval = 1 / rate if rate else 0.0
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        """Дожидается разрешённого слота для запроса по указанному адресу"""
+        if not self._interval:
+            return
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
@@ -0,0 +1,75 @@
+from typing import Literal, NamedTuple
+
+import logging
+import time
+
+from playwright.async_api import Page, Response
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessRule(NamedTuple):
+    """Условие готовности страницы определённого типа"""
+    # Элемент, появление которого в DOM означает готовность контента
+    selector: str | None = None
+    # Подстрока адреса ответа (например XHR с контентом), которого нужно дождаться
+    response_pattern: str | None = None
+    # Событие загрузки, которого дожидается навигация
+    wait_until: Literal["commit", "domcontentloaded", "load", "networkidle"] = "domcontentloaded"
+    # Таймаут в миллисекундах
+    timeout: float = 30_000
+
+
+# Условия готовности по типам страниц
+READINESS_RULES: dict[str, ReadinessRule] = {
+    "its_toc": ReadinessRule(selector="#w_metadata_toc"),
+    "its_document": ReadinessRule(selector="#w_metadata_doc_frame"),
+    "news_listing": ReadinessRule(selector="#news_filter"),
+    # Список новостей за период подгружается XHR запросом после выбора периода в фильтре
+    "news_period": ReadinessRule(selector="#news_content", response_pattern="/news"),
+    "news_article": ReadinessRule(selector="#actinfo"),
+    "infostart_listing": ReadinessRule(selector=".publication-item"),
+    "infostart_publication": ReadinessRule(selector=".center-side-wrap"),
+}
+
+
+async def goto_ready(
+        page: Page, url: str, page_type: str, rule: ReadinessRule | None = None
+) -> Response | None:
+    """Переходит на страницу и дожидается готовности её контента.
+
+    Вместо `networkidle` и фиксированных пауз ожидается конкретный ответ
+    сервера и/или элемент DOM, нужный для страницы этого типа.
+
+    :param page: Вкладка браузера.
+    :param url: Адрес страницы.
+    :param page_type: Тип страницы (ключ `READINESS_RULES`).
+    :param rule: Условие готовности, если отличается от условия по умолчанию.
+    :return Ответ на основной запрос навигации.
+    """
+    rule = rule or READINESS_RULES[page_type]
+    started = time.perf_counter()
+    if rule.response_pattern is not None:
+        pattern = rule.response_pattern
+        async with page.expect_response(
+            lambda response: pattern in response.url, timeout=rule.timeout
+        ):
+            response = await page.goto(url, wait_until=rule.wait_until, timeout=rule.timeout)
+    else:
+        response = await page.goto(url, wait_until=rule.wait_until, timeout=rule.timeout)
+    navigated = time.perf_counter()
+    metrics.observe("navigation", navigated - started)
+    if rule.selector is not None:
+        await page.wait_for_selector(rule.selector, state="attached", timeout=rule.timeout)
+        metrics.observe("selector_wait", time.perf_counter() - navigated)
+    logger.debug(
+        "%s ready in %.3fs (navigation %.3fs, content %.3fs): %s",
+        page_type,
+        time.perf_counter() - started,
+        navigated - started,
+        time.perf_counter() - navigated,
+        url,
+    )
+    return response
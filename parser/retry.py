@@ -0,0 +1,74 @@
+from typing import NamedTuple, TypeVar
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+
+import aiohttp
+from playwright.async_api import Error as PlaywrightError
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+# Ошибки, после которых запрос имеет смысл повторить (таймауты, сетевые сбои)
+TRANSIENT_ERRORS: tuple[type[Exception], ...] = (
+    PlaywrightError,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy(NamedTuple):
+    """Политика повторных попыток с экспоненциальной задержкой.
+
+    :param attempts: Максимальное количество попыток (включая первую).
+    :param base_delay: Задержка перед второй попыткой в секундах.
+    :param max_delay: Максимальная задержка между попытками в секундах.
+    """
+    attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """Задержка после неудачной попытки с номером `attempt` (с 1) со случайным разбросом"""
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, backoff)  # noqa: S311
+
+
+async def retry(
+        func: Callable[[], Awaitable[T]],
+        policy: RetryPolicy | None = None,
+        description: str = "",
+) -> T:
+    """Выполняет функцию, повторяя её при временных ошибках.
+
+    :param func: Асинхронная функция без аргументов.
+    :param policy: Политика повторных попыток (по умолчанию - 3 попытки).
+    :param description: Описание операции для логов.
+    :return Результат функции.
+    """
+    policy = policy or RetryPolicy()
+    attempt = 1
+    while True:
+        try:
+            return await func()
+        except TRANSIENT_ERRORS as e:
+            if attempt >= policy.attempts:
+                raise
+            delay = policy.delay(attempt)
+            logger.warning(
+                "Attempt %d/%d failed for %s: %s, retrying in %.1fs",
+                attempt,
+                policy.attempts,
+                description,
+                str(e).splitlines()[0] if str(e) else type(e).__name__,
+                delay,
+            )
+            metrics.increment("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
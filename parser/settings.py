@@ -1,23 +1,116 @@
-from typing import Final
+from typing import Literal
 
+from functools import lru_cache
 from pathlib import Path
 
-from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .constants import AUTH_PROBE_URL
+
 ROOT_DIR = Path(__file__).resolve().parent.parent
 ENV_PATH = ROOT_DIR / ".env"
 
-load_dotenv(ENV_PATH)
-
 
 class Credentials(BaseSettings):
     username: str = ""
     password: str = ""
 
-    model_config = SettingsConfigDict(env_prefix="ITS_")
+    model_config = SettingsConfigDict(env_prefix="ITS_", env_file=ENV_PATH, extra="ignore")
+
+
+class SessionSettings(BaseSettings):
+    # Файл с сохранённым состоянием авторизованной сессии (`None` - входить при каждом запуске)
+    state_path: Path | None = ROOT_DIR / "data" / "storage_state.json"
+    # Закрытая страница для проверки сессии
+    probe_url: str = AUTH_PROBE_URL
+
+    model_config = SettingsConfigDict(env_prefix="SESSION_", env_file=ENV_PATH, extra="ignore")
+
+
+class BrowserSettings(BaseSettings):
+    # Запуск браузера без графического интерфейса
+    headless: bool = True
+    # Типы ресурсов, которые не загружаются при обходе (в терминах Playwright)
+    blocked_resource_types: set[str] = {"image", "media", "font", "stylesheet", "manifest"}
+    # Домены, с которых разрешена загрузка (вместе с поддоменами), пустое множество - любые
+    allowed_hosts: set[str] = {"1c.ru", "infostart.ru"}
+    # Домены, загрузка с которых всегда запрещена (аналитика, реклама)
+    denied_hosts: set[str] = {
+        "mc.yandex.ru",
+        "top-fwz1.mail.ru",
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "vk.com",
+    }
+
+    model_config = SettingsConfigDict(env_prefix="BROWSER_", env_file=ENV_PATH, extra="ignore")
+
+
+class CrawlSettings(BaseSettings):
+    # Количество одновременно открытых вкладок при обходе раздела
+    concurrency: int = 4
+    # Максимальное количество запросов в секунду к одному хосту
+    rate_limit: float | None = None
+    # Максимальная глубина вложенности глав в оглавлении
+    toc_max_depth: int = 5
+    # Количество процессов для конвертации HTML -> Markdown (по умолчанию - количество ядер)
+    convert_workers: int | None = None
+    # Максимальное количество документов в одной пачке на конвертацию
+    convert_batch_size: int = 16
+    # Путь до индекса загруженных документов (`None` - без инкрементального обхода)
+    index_path: Path | None = ROOT_DIR / "data" / "index.sqlite3"
+    # Время в секундах, в течение которого документ из индекса не перезагружается
+    index_max_age: float | None = None
+    # Формат и директория для записи результатов
+    output_format: Literal[
+        "jsonl", "jsonl.gz", "directory", "dedup.jsonl", "chunks.jsonl", "chunks.parquet"
+    ] = "jsonl"
+    output_dir: Path = ROOT_DIR / "data" / "output"
+    # Разбиение на фрагменты для форматов `chunks.*`: размер фрагмента и перекрытия
+    # в токенах, количество фрагментов в одном шарде
+    chunk_max_tokens: int = 512
+    chunk_overlap_tokens: int = 64
+    chunk_shard_size: int = 10000
+    # Загрузить картинки документов после обхода (только для формата `dedup.jsonl`)
+    download_images: bool = False
+    # Журнал обхода (`None` - без журнала) и продолжение прерванного обхода по нему
+    journal_path: Path | None = ROOT_DIR / "data" / "journal.sqlite3"
+    resume: bool = False
+    # Повторные попытки загрузки документа при временных ошибках
+    retry_attempts: int = 3
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    # Распределённый обход: общая очередь документов, количество процессов-обработчиков,
+    # время аренды документа в секундах и количество попыток до отметки об ошибке
+    queue_path: Path = ROOT_DIR / "data" / "queue.sqlite3"
+    workers: int = 2
+    lease_timeout: float = 600
+    queue_max_attempts: int = 3
+    queue_poll_interval: float = 5
+    # Итоговая сводка метрик в JSON и (опционально) в формате Prometheus
+    metrics_path: Path | None = ROOT_DIR / "data" / "metrics.json"
+    metrics_prometheus_path: Path | None = None
+
+    model_config = SettingsConfigDict(env_prefix="CRAWL_", env_file=ENV_PATH, extra="ignore")
+
+
+# Настройки читаются из окружения и `.env` при первом обращении, а не при импорте модуля
+@lru_cache(maxsize=1)
+def get_credentials() -> Credentials:
+    return Credentials()
+
+
+@lru_cache(maxsize=1)
+def get_session_settings() -> SessionSettings:
+    return SessionSettings()
+
 
+@lru_cache(maxsize=1)
+def get_browser_settings() -> BrowserSettings:
+    return BrowserSettings()
 
-credentials: Final[Credentials] = Credentials()
 
-print(credentials)
+@lru_cache(maxsize=1)
+def get_crawl_settings() -> CrawlSettings:
+    return CrawlSettings()
@@ -0,0 +1,134 @@
+from typing import Any, Literal, TextIO
+
+import gzip
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from .datastructures import ChapterNode
+
+SinkFormat = Literal[
+    "jsonl", "jsonl.gz", "directory", "dedup.jsonl", "chunks.jsonl", "chunks.parquet"
+]
+
+
+class Sink(ABC):
+    """Приёмник документов, записывающий их по мере готовности"""
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @abstractmethod
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        """Записывает документ главы"""
+
+    def close(self) -> None:  # noqa: B027
+        """Освобождает ресурсы приёмника"""
+
+
+def serialize_document(chapter: ChapterNode, markdown: str) -> str:
+    """Сериализует документ главы в JSON строку"""
+    return json.dumps(
+        {
+            "url": chapter.url,
+            "path": chapter.path(),
+            "depth": chapter.current_depth(),
+            "markdown": markdown,
+        },
+        ensure_ascii=False,
+    )
+
+
+class JSONLSink(Sink):
+    """Записывает документы в JSONL файл (по одному JSON объекту на строку).
+
+    :param path: Путь до файла.
+    :param append: Дописать документы в существующий файл, а не перезаписать его.
+    """
+
+    def __init__(self, path: Path | str, append: bool = False) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file: TextIO = open(path, "a" if append else "w", encoding="utf-8")  # noqa: SIM115
+
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        self._file.write(serialize_document(chapter, markdown) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CompressedJSONLSink(Sink):
+    """Записывает документы в сжатый JSONL файл.
+
+    Каждый документ записывается отдельным gzip блоком, поэтому все полностью
+    записанные документы читаются даже после аварийного завершения.
+
+    :param path: Путь до файла.
+    :param append: Дописать документы в существующий файл, а не перезаписать его.
+    """
+
+    def __init__(self, path: Path | str, append: bool = False) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "ab" if append else "wb")  # noqa: SIM115
+
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        line = serialize_document(chapter, markdown) + "\n"
+        self._file.write(gzip.compress(line.encode()))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class DirectorySink(Sink):
+    """Записывает каждый документ в отдельный Markdown файл"""
+
+    def __init__(self, path: Path | str) -> None:
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, chapter: ChapterNode, markdown: str) -> None:
+        filename = re.sub(r"[^\w.-]+", "_", chapter.url.split("://", 1)[-1]).strip("_")
+        file_path = self._path / f"{filename}.md"
+        # Пишем во временный файл, чтобы после сбоя не оставалось недописанных документов
+        tmp_path = file_path.with_suffix(".md.tmp")
+        tmp_path.write_text(f"{chapter.path()}\n\n{markdown}", encoding="utf-8")
+        os.replace(tmp_path, file_path)
+
+
+def create_sink(
+        sink_format: SinkFormat, path: Path | str, append: bool = False, **options: Any
+) -> Sink:
+    """Создаёт приёмник документов нужного формата.
+
+    :param sink_format: Формат вывода.
+    :param path: Путь до файла (или директории) с результатами.
+    :param append: Дописать документы к результатам прошлого запуска
+    (при продолжении прерванного обхода), а не перезаписать их.
+    :param options: Параметры разбиения на фрагменты для форматов `chunks.*`
+    (см. `ChunkSink`), для остальных форматов игнорируются.
+    :return Приёмник документов.
+    """
+    if sink_format == "jsonl":
+        return JSONLSink(path, append)
+    if sink_format == "jsonl.gz":
+        return CompressedJSONLSink(path, append)
+    if sink_format == "directory":
+        return DirectorySink(path)
+    if sink_format == "dedup.jsonl":
+        from .dedup import DedupSink  # noqa: PLC0415
+
+        # Хранилище блоков общее для всех разделов, записываемых в одну директорию
+        return DedupSink(path, Path(path).parent / "store", append)
+    if sink_format in {"chunks.jsonl", "chunks.parquet"}:
+        from .chunking import ChunkSink, ShardFormat  # noqa: PLC0415
+
+        shard_format: ShardFormat = "jsonl" if sink_format == "chunks.jsonl" else "parquet"
+        return ChunkSink(path, shard_format=shard_format, append=append, **options)
+    raise ValueError(f"Unknown sink format: {sink_format}")
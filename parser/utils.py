@@ -1,108 +1,306 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import logging
 import re
+from functools import lru_cache
+from importlib.util import find_spec
 from urllib.parse import urljoin, urlparse
 
-from bs4 import BeautifulSoup
-from markdownify import markdownify
-from playwright.async_api import Browser, Page
+from .metrics import metrics
+
+# Playwright, BeautifulSoup и markdownify импортируются по требованию: модуль загружается
+# в каждом процессе конвертации, которому браузер не нужен
+if TYPE_CHECKING:
+    from bs4 import Tag
+    from playwright.async_api import Browser, BrowserContext, Page
 
 logger = logging.getLogger(__name__)
 
 
+async def get_current_context(browser: Browser) -> BrowserContext:
+    """Получает текущий контекст браузера (в нём хранится сессия авторизации)"""
+    if not browser.contexts:
+        return await browser.new_context()
+    return browser.contexts[0]
+
+
 async def get_current_page(browser: Browser) -> Page:
     """Получает текущую страницу в браузере"""
-    if not browser.contexts:
-        context = await browser.new_context()
-        return await context.new_page()
-    context = browser.contexts[0]
+    context = await get_current_context(browser)
     if not context.pages:
         return await context.new_page()
     return context.pages[-1]
 
 
-def html2md_pipeline(html_content: str, base_url: str) -> str:
-    return md_links_filter(
-        markdownify(
-            html_links_filter(
-                preserve_image_links(html_content, base_url), base_url
-            )
-        ), base_url
-    )
+# Парсер HTML для BeautifulSoup, "lxml" заметно быстрее (требует установленного lxml)
+DEFAULT_HTML_PARSER = "lxml" if find_spec("lxml") is not None else "html.parser"
+
+
+def html2md_pipeline(
+        html_content: str, base_url: str, parser: str = DEFAULT_HTML_PARSER
+) -> str:
+    """Преобразует HTML документ в Markdown.
+
+    HTML разбирается один раз: картинки и доменные ссылки обрабатываются за один
+    проход по дереву, после чего дерево сразу передаётся конвертеру.
+
+    :param html_content: HTML содержимое документа.
+    :param base_url: Основной адрес сайта.
+    :param parser: Парсер HTML для BeautifulSoup.
+    :return Содержимое документа в формате Markdown.
+    """
+    from markdownify import MarkdownConverter  # noqa: PLC0415
+
+    with metrics.timer("html_transform"):
+        tree = transform_html(html_content, base_url, parser)
+    with metrics.timer("markdown_convert"):
+        md_text = MarkdownConverter().convert_soup(tree).strip("\n")
+    with metrics.timer("links_filter"):
+        return md_links_filter(md_text, base_url)
+
+
+def transform_html(
+        html_content: str, base_url: str, parser: str = DEFAULT_HTML_PARSER
+) -> Tag:
+    """Подготавливает HTML документ к конвертации за один проход по дереву:
+    сохраняет абсолютные URL картинок и удаляет все доменные ссылки.
+
+    :param html_content: HTML содержимое документа.
+    :param base_url: Основной адрес сайта.
+    :param parser: Парсер HTML для BeautifulSoup.
+    :return Содержимое `<body>` документа (или весь документ, если `<body>` нет).
+    """
+    from bs4 import BeautifulSoup  # noqa: PLC0415
+
+    soup = BeautifulSoup(html_content, parser)
+    tree = soup.body or soup
+    current_domain = urlparse(base_url).netloc
+    removed = False
+    for tag in tree.find_all(("img", "a")):
+        if tag.decomposed:
+            continue
+        if tag.name == "img" and tag.get("src"):
+            _preserve_image_link(tag, base_url)
+        elif tag.name == "a" and tag.get("href") and _is_domain_link(
+            _attribute(tag, "href"), base_url, current_domain
+        ):
+            tag.decompose()
+            removed = True
+    if removed:
+        # Склеиваем соседние текстовые узлы, оставшиеся после удаления ссылок
+        tree.smooth()
+    return tree
+
+
+def _attribute(tag: Tag, name: str) -> str:
+    """Значение атрибута строкой (для многозначных атрибутов BeautifulSoup возвращает список)"""
+    value = tag.get(name)
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else " ".join(value)
+
+
+def _preserve_image_link(img: Tag, base_url: str) -> None:
+    src = _attribute(img, "src")
+    try:
+        if not src.startswith(("http://", "https://", "data:")):
+            img["src"] = urljoin(base_url, src)
+    except Exception as e:
+        logger.exception("Error while preserving image URL: %s", str(e))
+
+
+def _is_domain_link(href: str, base_url: str, current_domain: str) -> bool:
+    try:
+        if "image" in href:
+            return False
+        url = urljoin(base_url, href) if not href.startswith(("http://", "https://")) else href
+        link_domain = urlparse(url).netloc
+    except Exception as e:
+        logger.exception("Error while href removing: %s", str(e))
+        return False
+    return link_domain == current_domain or link_domain.endswith("." + current_domain)
 
 
 def preserve_image_links(html_content: str, base_url: str) -> str:
     """
     Сохраняет абсолютные URL картинок на странице, преобразуя относительные пути в абсолютные
     """
+    from bs4 import BeautifulSoup  # noqa: PLC0415
+
     soup = BeautifulSoup(html_content, "html.parser")
     for img in soup.find_all("img", src=True):
-        src = img["src"]
-        try:
-            if not src.startswith(("http://", "https://", "data:")):
-                url = urljoin(base_url, src)
-                img["src"] = url
-            elif src.startswith(("http://", "https://")):
-                img["src"] = src
-        except Exception as e:
-            logger.exception("Error while preserving image URL: %s", str(e))
-            continue
+        _preserve_image_link(img, base_url)
     return str(soup)
 
 
 def html_links_filter(html_content: str, base_url: str) -> str:
     """Удаляет все доменные ссылки на странице"""
+    from bs4 import BeautifulSoup  # noqa: PLC0415
+
     soup = BeautifulSoup(html_content, "html.parser")
     current_domain = urlparse(base_url).netloc
     for a in soup.find_all("a", href=True):
-        href = a["href"]
+        if not a.decomposed and _is_domain_link(_attribute(a, "href"), base_url, current_domain):
+            a.decompose()
+    return str(soup)
+
+
+# Начало возможной ссылки: картинка, Markdown ссылка, автоссылка `<URL>` или простой URL
+LINK_START_PATTERN = re.compile(r"!?\[|<?https?://")
+PAREN_PATTERN = re.compile(r"[()]")
+NON_SPACE_PATTERN = re.compile(r"\S*")
+# Знаки в конце простого URL, которые относятся к тексту, а не к адресу
+TRAILING_PUNCTUATION = ".,:;!?*_~'\""
+
+
+class LinkFilter:
+    """Удаляет из Markdown ссылки на страницы сайта за один линейный проход.
+
+    Markdown ссылки на сайт (абсолютные или относительные) заменяются своим
+    текстом, простые URL и автоссылки `<URL>` сайта удаляются, картинки и внешние
+    ссылки сохраняются без изменений. Поиск закрывающих скобок использует запомненные позиции,
+    поэтому время работы линейно по размеру документа даже на строках
+    с множеством незакрытых скобок.
+
+    :param base_url: Основной адрес сайта.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        self._domain = (urlparse(base_url).hostname or base_url).lower()
+
+    def __call__(self, md_text: str) -> str:
+        return _LinkScanner(md_text, self).run()
+
+    def is_site_link(self, target: str) -> bool:
+        """Ссылка ведёт на страницу сайта (относительная или на домен сайта и его поддомены)"""
+        if target.startswith("/") and not target.startswith("//"):
+            return True
         try:
-            if "image" in href:
+            host = urlparse(target).hostname
+        except ValueError:
+            return False
+        return host is not None and (host == self._domain or host.endswith(f".{self._domain}"))
+
+
+class _LinkScanner:
+    """Однократный проход `LinkFilter` по документу"""
+
+    def __init__(self, text: str, link_filter: LinkFilter) -> None:
+        self._text = text
+        self._filter = link_filter
+        # Символ -> (позиция, с которой искали; найденная позиция или len(text))
+        self._next: dict[str, tuple[int, int]] = {}
+        # Позиция `(` -> позиция парной `)` в последней разобранной строке
+        self._parens: dict[int, int] = {}
+        self._parens_until = -1
+
+    def _find(self, char: str, start: int) -> int:
+        searched_from, found = self._next.get(char, (-1, -1))
+        if searched_from <= start <= found:
+            return found
+        found = self._text.find(char, start)
+        if found == -1:
+            found = len(self._text)
+        self._next[char] = (start, found)
+        return found
+
+    def _closing_paren(self, position: int, line_end: int) -> int:
+        """Позиция `)`, парной к `(` в `position`, или -1 (каждая строка разбирается один раз)"""
+        if position >= self._parens_until:
+            self._parens = {}
+            opened: list[int] = []
+            line_start = self._text.rfind("\n", 0, position) + 1
+            for match in PAREN_PATTERN.finditer(self._text, line_start, line_end):
+                if match.group() == "(":
+                    opened.append(match.start())
+                elif opened:
+                    self._parens[opened.pop()] = match.start()
+            self._parens_until = line_end
+        return self._parens.get(position, -1)
+
+    def _bracket(self, start: int, nested: bool = False) -> tuple[int, str] | None:
+        """Разбирает `[текст](адрес)` с позиции `[`: (позиция после `)`, адрес)"""
+        line_end = self._find("\n", start)
+        text_start = start + 1
+        if not nested and self._text.startswith("![", text_start):
+            # Картинка внутри текста ссылки: `[![alt](src)](href)`
+            image = self._bracket(text_start + 1, nested=True)
+            if image is not None:
+                text_start = image[0]
+        close = self._find("]", text_start)
+        if close >= line_end or not self._text.startswith("(", close + 1):
+            return None
+        # Адрес может содержать парные скобки: `[текст](/a_(b))`
+        target_end = self._closing_paren(close + 1, line_end)
+        if target_end == -1:
+            target_end = self._find(")", close + 2)
+        if target_end >= line_end:
+            return None
+        target = self._text[close + 2:target_end].strip()
+        return target_end + 1, target.split(" ", 1)[0] if target else ""
+
+    def run(self) -> str:
+        text = self._text
+        pieces: list[str] = []
+        position = 0
+        while (match := LINK_START_PATTERN.search(text, position)) is not None:
+            start = match.start()
+            token = match.group()
+            if not token.endswith("["):
+                url_start = start + 1 if token.startswith("<") else start
+                url_match = NON_SPACE_PATTERN.match(text, url_start)
+                match_end = url_match.end() if url_match is not None else url_start
+                autolink_end = text.find(">", url_start, match_end) if url_start > start else -1
+                if autolink_end != -1:
+                    # Автоссылка удаляется вместе с угловыми скобками
+                    url_end, end = autolink_end, autolink_end + 1
+                else:
+                    start = url_start
+                    url_end = end = _url_end(text, url_start, match_end)
+                pieces.append(text[position:start])
+                if not self._filter.is_site_link(text[url_start:url_end]):
+                    pieces.append(text[start:end])
+                position = end
                 continue
-            if not href.startswith(("http://", "https://")):
-                url = urljoin(base_url, href)
+            bracket_start = start + 1 if token == "![" else start
+            parsed = self._bracket(bracket_start)
+            if parsed is None:
+                pieces.append(text[position:match.end()])
+                position = match.end()
+                continue
+            end, target = parsed
+            pieces.append(text[position:start])
+            if token == "![" or not self._filter.is_site_link(target):
+                pieces.append(text[start:end])
             else:
-                url = href
-            link_domain = urlparse(url).netloc
-            if link_domain == current_domain or link_domain.endswith("." + current_domain):
-                a.decompose()
-        except Exception as e:
-            logger.exception("Error while href removing: %s", str(e))
-            continue
-    return str(soup)
+                close = text.rfind("](", start, end)
+                pieces.append(text[start + 1:close])
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
+def _url_end(text: str, start: int, end: int) -> int:
+    """Конец простого URL без завершающих знаков препинания и непарной `)`"""
+    unbalanced = text.count(")", start, end) - text.count("(", start, end)
+    while end > start:
+        char = text[end - 1]
+        if char == ")" and unbalanced > 0:
+            unbalanced -= 1
+        elif char not in TRAILING_PUNCTUATION:
+            break
+        end -= 1
+    return end
+
+
+@lru_cache(maxsize=32)
+def get_link_filter(base_url: str) -> LinkFilter:
+    """Фильтр ссылок для сайта (создаётся один раз для каждого адреса)"""
+    return LinkFilter(base_url)
 
 
 def md_links_filter(md_text: str, base_url: str) -> str:
-    """Удаляет все относительные ссылки в Markdown тексте, но сохраняет изображения"""
-    # Временная замена изображений перед обработкой
-    image_placeholders = {}
-    # Находим и временно заменяем все изображения
-
-    def replace_images(match):
-        placeholder = f"@@IMAGE_{len(image_placeholders)}@@"
-        image_placeholders[placeholder] = match.group(0)
-        return placeholder
-    # Паттерн для изображений Markdown
-    image_pattern = r"!\[.*?\]\([^)]*\)"
-    md_text = re.sub(image_pattern, replace_images, md_text)
-    # Теперь удаляем все ссылки
-    domain = urlparse(base_url).netloc
-    domain_pattern = re.escape(domain)
-    base_url_pattern = re.escape(base_url)
-    patterns = [
-        # Markdown ссылки
-        r"\[(.*?)\]\([^)]*" + domain_pattern + r"[^)]*\)",
-        r"\[(.*?)\]\([^)]*" + base_url_pattern + r"[^)]*\)",
-        r"\[(.*?)\]\(/[^)]*\)",
-        # Простые URL
-        r"https?://[^\s]*" + domain_pattern + r"[^\s]*",
-        r"https?://[^\s]*" + base_url_pattern + r"[^\s]*",
-        r"/[^\s/\?]*"
-    ]
-    for pattern in patterns:
-        if pattern.startswith(r"\["):
-            md_text = re.sub(pattern, r"\1", md_text)
-        else:
-            md_text = re.sub(pattern, "", md_text)
-    for placeholder, image in image_placeholders.items():
-        md_text = md_text.replace(placeholder, image)
-    return md_text
+    """Удаляет все ссылки на страницы сайта в Markdown тексте, но сохраняет изображения"""
+    return get_link_filter(base_url)(md_text)
@@ -0,0 +1,185 @@
+from typing import Literal, NamedTuple
+
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from .datastructures import ChapterNode
+
+# Состояние документа в очереди
+WorkState = Literal["pending", "leased", "done", "failed"]
+
+
+class WorkItem(NamedTuple):
+    url: str                            # Адрес документа
+    db_path: str                        # Раздел, к которому относится документ
+    lineage: list[tuple[str, str]]      # Цепочка глав от корня (см. `ChapterNode.lineage`)
+    attempts: int = 0                   # Количество предыдущих попыток
+
+    @classmethod
+    def from_chapter(cls, db_path: str, chapter: ChapterNode) -> "WorkItem":
+        return cls(url=chapter.url, db_path=db_path, lineage=chapter.lineage())
+
+    def chapter(self) -> ChapterNode:
+        """Восстанавливает главу документа вместе с её путём в дереве"""
+        return ChapterNode.from_lineage(self.lineage)
+
+
+class WorkQueue(ABC):
+    """Общая очередь документов для распределённого обхода.
+
+    Обработчик берёт документ в аренду на ограниченное время, если он не
+    подтвердит обработку до её окончания (например, процесс упал),
+    документ после `reclaim_expired` снова становится доступным другим обработчикам.
+    Каждая аренда считается попыткой, поэтому документ, на котором падают
+    обработчики, тоже отмечается ошибочным после исчерпания попыток.
+    """
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @abstractmethod
+    def put(self, items: Iterable[WorkItem]) -> None:
+        """Добавляет документы в очередь, не изменяя состояние уже известных"""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_timeout: float) -> WorkItem | None:
+        """Берёт в аренду следующий документ (засчитывая попытку) или возвращает `None`"""
+
+    @abstractmethod
+    def complete(self, url: str) -> None:
+        """Подтверждает успешную обработку документа"""
+
+    @abstractmethod
+    def fail(self, url: str, error: str, max_attempts: int) -> None:
+        """Возвращает документ в очередь или, если попытки исчерпаны, отмечает его ошибочным"""
+
+    @abstractmethod
+    def reclaim_expired(self, max_attempts: int) -> int:
+        """Возвращает в очередь документы с истёкшей арендой (или, если попытки исчерпаны,
+        отмечает их ошибочными) и возвращает их количество"""
+
+    @abstractmethod
+    def counts(self) -> dict[WorkState, int]:
+        """Количество документов в каждом состоянии"""
+
+    def close(self) -> None:  # noqa: B027
+        """Освобождает ресурсы очереди"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Очередь документов в SQLite для обработчиков на одном хосте.
+
+    Аренда выполняется в транзакции `BEGIN IMMEDIATE`, поэтому один документ
+    не может быть выдан двум процессам одновременно.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS work_queue (
+                url TEXT PRIMARY KEY,
+                db_path TEXT NOT NULL,
+                lineage TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                lease_until REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS work_queue_state ON work_queue (state, lease_until)"
+        )
+
+    def put(self, items: Iterable[WorkItem]) -> None:
+        now = time.time()
+        with self._transaction():
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO work_queue (url, db_path, lineage, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (item.url, item.db_path, json.dumps(item.lineage, ensure_ascii=False), now)
+                    for item in items
+                ),
+            )
+
+    def claim(self, worker_id: str, lease_timeout: float) -> WorkItem | None:
+        now = time.time()
+        with self._transaction():
+            row = self._connection.execute(
+                "SELECT url, db_path, lineage, attempts FROM work_queue "
+                "WHERE state = 'pending' ORDER BY rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE work_queue SET state = 'leased', attempts = attempts + 1, "
+                "worker_id = ?, lease_until = ?, updated_at = ? WHERE url = ?",
+                (worker_id, now + lease_timeout, now, row[0]),
+            )
+        url, db_path, lineage, attempts = row
+        return WorkItem(
+            url=url,
+            db_path=db_path,
+            lineage=[(name, chapter_url) for name, chapter_url in json.loads(lineage)],
+            attempts=attempts,
+        )
+
+    def complete(self, url: str) -> None:
+        self._connection.execute(
+            "UPDATE work_queue SET state = 'done', worker_id = NULL, "
+            "lease_until = NULL, last_error = NULL, updated_at = ? WHERE url = ?",
+            (time.time(), url),
+        )
+
+    def fail(self, url: str, error: str, max_attempts: int) -> None:
+        self._connection.execute(
+            "UPDATE work_queue SET "
+            "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker_id = NULL, lease_until = NULL, "
+            "last_error = ?, updated_at = ? WHERE url = ?",
+            (max_attempts, error, time.time(), url),
+        )
+
+    def reclaim_expired(self, max_attempts: int) -> int:
+        now = time.time()
+        cursor = self._connection.execute(
+            "UPDATE work_queue SET "
+            "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker_id = NULL, lease_until = NULL, last_error = 'Lease expired', updated_at = ? "
+            "WHERE state = 'leased' AND lease_until < ?",
+            (max_attempts, now, now),
+        )
+        return cursor.rowcount
+
+    def counts(self) -> dict[WorkState, int]:
+        rows = self._connection.execute(
+            "SELECT state, COUNT(*) FROM work_queue GROUP BY state"
+        )
+        return dict(rows.fetchall())
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Транзакция с блокировкой на запись с момента начала"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
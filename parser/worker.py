@@ -1,17 +1,178 @@
+import logging
+from contextlib import aclosing
+
 from playwright.async_api import async_playwright
 
 from parser.auth import authenticate
-from parser.settings import credentials
-from parser.modules.db import parse_db
+from parser.browser import launch_browser, new_context
+from parser.cache import DocumentIndex
+from parser.converter import ConversionStage
+from parser.dedup import download_images
+from parser.engine import SiteAdapter, crawl_site
+from parser.http import create_http_session
+from parser.journal import CrawlJournal
+from parser.metrics import metrics
+from parser.retry import TRANSIENT_ERRORS, RetryPolicy
+from parser.settings import (
+    get_browser_settings,
+    get_crawl_settings,
+    get_credentials,
+    get_session_settings,
+)
+from parser.modules.db import iterate_db
+from parser.sinks import Sink, create_sink
 from parser.constants import DB_LINKS
 
+logger = logging.getLogger(__name__)
+
+
+def open_sink(db_link: str, worker_id: str | None = None, append: bool = False) -> Sink:
+    """Создаёт приёмник документов раздела (отдельный файл для каждого обработчика).
+
+    :param db_link: Ссылка на раздел (или название источника).
+    :param worker_id: Идентификатор обработчика распределённого обхода.
+    :param append: Дописать документы к результатам прошлого запуска.
+    :return Приёмник документов.
+    """
+    crawl_settings = get_crawl_settings()
+    output_name = db_link.strip("/").replace("/", "_")
+    if crawl_settings.output_format != "directory":
+        if worker_id is not None:
+            output_name = f"{output_name}.{worker_id}"
+        output_name = f"{output_name}.{crawl_settings.output_format}"
+    return create_sink(
+        crawl_settings.output_format,
+        crawl_settings.output_dir / output_name,
+        append=append,
+        max_tokens=crawl_settings.chunk_max_tokens,
+        overlap_tokens=crawl_settings.chunk_overlap_tokens,
+        shard_size=crawl_settings.chunk_shard_size,
+    )
+
+
+def crawl_retry_policy() -> RetryPolicy:
+    """Политика повторных попыток из настроек обхода"""
+    crawl_settings = get_crawl_settings()
+    return RetryPolicy(
+        attempts=crawl_settings.retry_attempts,
+        base_delay=crawl_settings.retry_base_delay,
+        max_delay=crawl_settings.retry_max_delay,
+    )
+
 
 async def its_worker() -> None:
+    crawl_settings = get_crawl_settings()
+    browser_settings = get_browser_settings()
+    session_settings = get_session_settings()
     async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=False)
-        await authenticate(browser, credentials=credentials)
-        for db_link in DB_LINKS:
-            docs = await parse_db(browser, db_link)
-            print(len(docs))
-            print(docs)
+        browser = await launch_browser(playwright, browser_settings)
+        await authenticate(
+            browser,
+            credentials=get_credentials(),
+            state_path=session_settings.state_path,
+            probe_url=session_settings.probe_url,
+            profile=browser_settings,
+        )
+        session = await create_http_session(browser.contexts[0], limit=crawl_settings.concurrency)
+        converter = ConversionStage(
+            max_workers=crawl_settings.convert_workers,
+            batch_size=crawl_settings.convert_batch_size,
+        )
+        index = (
+            DocumentIndex(crawl_settings.index_path)
+            if crawl_settings.index_path is not None
+            else None
+        )
+        journal = (
+            CrawlJournal(crawl_settings.journal_path)
+            if crawl_settings.journal_path is not None
+            else None
+        )
+        retry_policy = crawl_retry_policy()
+        async with session, converter:
+            for db_link in DB_LINKS:
+                count = 0
+                try:
+                    # Дописываем только при продолжении обхода: иначе журнал сброшен
+                    # и все документы раздела будут загружены заново
+                    with open_sink(db_link, append=crawl_settings.resume) as sink:
+                        async for chapter, document_content in iterate_db(
+                            browser,
+                            db_link,
+                            concurrency=crawl_settings.concurrency,
+                            rate_limit=crawl_settings.rate_limit,
+                            max_depth=crawl_settings.toc_max_depth,
+                            session=session,
+                            converter=converter,
+                            index=index,
+                            max_age=crawl_settings.index_max_age,
+                            # Документы пишутся в порядке глав раздела
+                            ordered=True,
+                            journal=journal,
+                            resume=crawl_settings.resume,
+                            retry_policy=retry_policy,
+                        ):
+                            with metrics.timer("write"):
+                                sink.write(chapter, document_content)
+                            count += 1
+                except TRANSIENT_ERRORS as e:
+                    # Оглавление раздела так и не загрузилось - переходим к следующему разделу
+                    logger.error("Failed to parse %s: %s", db_link, e)  # noqa: TRY400
+                    continue
+                logger.info("Parsed %s: %d documents", db_link, count)
+                if journal is not None:
+                    logger.info("Journal %s: %s", db_link, journal.counts(db_link))
+            if crawl_settings.download_images and crawl_settings.output_format == "dedup.jsonl":
+                count = await download_images(
+                    session, crawl_settings.output_dir / "store", crawl_settings.concurrency
+                )
+                logger.info("Downloaded %d images", count)
+        if index is not None:
+            index.close()
+        if journal is not None:
+            journal.close()
         await browser.close()
+    metrics.write(crawl_settings.metrics_path, crawl_settings.metrics_prometheus_path)
+
+
+async def site_worker(adapter: SiteAdapter) -> None:
+    """Обходит сайт по адаптеру и записывает материалы в приёмник источника"""
+    crawl_settings = get_crawl_settings()
+    browser_settings = get_browser_settings()
+    converter = ConversionStage(
+        max_workers=crawl_settings.convert_workers,
+        batch_size=crawl_settings.convert_batch_size,
+    )
+    count = 0
+    async with async_playwright() as playwright, converter:
+        browser = await launch_browser(playwright, browser_settings)
+        index = (
+            DocumentIndex(crawl_settings.index_path)
+            if crawl_settings.index_path is not None
+            else None
+        )
+        try:
+            await new_context(browser, browser_settings)
+            documents = crawl_site(
+                browser,
+                adapter,
+                concurrency=crawl_settings.concurrency,
+                rate_limit=crawl_settings.rate_limit,
+                converter=converter,
+                index=index,
+                max_age=crawl_settings.index_max_age,
+                retry_policy=crawl_retry_policy(),
+            )
+            # Закрываем обход до закрытия браузера, даже если запись документа упала
+            async with aclosing(documents):
+                with open_sink(adapter.name) as sink:
+                    async for link, markdown in documents:
+                        with metrics.timer("write"):
+                            sink.write(adapter.chapter(link), markdown)
+                        count += 1
+            logger.info("Parsed %s: %d documents", adapter.name, count)
+        finally:
+            if index is not None:
+                index.close()
+            await browser.close()
+            metrics.write(crawl_settings.metrics_path, crawl_settings.metrics_prometheus_path)
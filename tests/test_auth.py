@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+
+import pytest
+from playwright.async_api import Error as PlaywrightError
+
+from parser import auth
+from parser.auth import authenticate, file_lock, is_session_valid
+from parser.constants import AUTH_PROBE_URL, LOGIN_URL
+from parser.settings import Credentials
+
+STATE = {"cookies": [{"name": "session", "value": "fresh"}], "origins": []}
+
+
+class FakeResponse:
+    def __init__(self, url: str, ok: bool = True) -> None:
+        self.url = url
+        self.ok = ok
+        self.disposed = False
+
+    async def dispose(self) -> None:
+        self.disposed = True
+
+
+class FakeRequest:
+    def __init__(self, result: FakeResponse | Exception) -> None:
+        self._result = result
+
+    async def get(self, url: str) -> FakeResponse:  # noqa: ARG002
+        if isinstance(self._result, Exception):
+            raise self._result
+        return self._result
+
+
+class FakeContext:
+    def __init__(self, result: FakeResponse | Exception | None = None) -> None:
+        self.request = FakeRequest(result or FakeResponse(AUTH_PROBE_URL))
+        self.closed = False
+
+    async def new_page(self) -> None:
+        return None
+
+    async def storage_state(self, path: Path) -> None:
+        path.write_text(json.dumps(STATE), encoding="utf-8")
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.contexts: list[FakeContext] = []
+
+
+@pytest.mark.parametrize(
+    ("result", "expected"),
+    [
+        (FakeResponse(AUTH_PROBE_URL), True),
+        (FakeResponse(f"{LOGIN_URL}/login?service=its"), False),
+        (FakeResponse(AUTH_PROBE_URL, ok=False), False),
+        (PlaywrightError("net::ERR_CONNECTION_RESET"), False),
+        (TimeoutError("probe timed out"), False),
+    ],
+)
+def test_is_session_valid(result: FakeResponse | Exception, expected: bool) -> None:
+    context = FakeContext(result)
+    assert asyncio.run(is_session_valid(context)) is expected  # type: ignore[arg-type]
+    if isinstance(result, FakeResponse):
+        assert result.disposed
+
+
+def test_authenticate_replaces_expired_state_file(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    state_path = tmp_path / "session" / "state.json"
+    state_path.parent.mkdir()
+    state_path.write_text(json.dumps({"cookies": [], "origins": []}), encoding="utf-8")
+    contexts: list[FakeContext] = []
+
+    async def new_context(
+            browser: FakeBrowser, profile: None, **kwargs: object  # noqa: ARG001
+    ) -> FakeContext:
+        # Сохранённая сессия истекла: проверка перенаправляет на страницу входа
+        context = FakeContext(FakeResponse(f"{LOGIN_URL}/login") if kwargs else None)
+        browser.contexts.append(context)
+        contexts.append(context)
+        return context
+
+    async def login(page: None, credentials: Credentials) -> None:  # noqa: ARG001
+        return None
+
+    monkeypatch.setattr(auth, "new_context", new_context)
+    monkeypatch.setattr(auth, "login", login)
+    credentials = Credentials(username="user", password="password")  # noqa: S106
+    authenticated = authenticate(FakeBrowser(), credentials, state_path)  # type: ignore[arg-type]
+    asyncio.run(authenticated)
+
+    assert contexts[0].closed
+    assert json.loads(state_path.read_text(encoding="utf-8")) == STATE
+    assert state_path.stat().st_mode & 0o777 == 0o600
+    assert sorted(path.name for path in state_path.parent.iterdir()) == ["state.json"]
+
+
+def test_file_lock_serializes_holders_and_removes_stale_lock(tmp_path: Path) -> None:
+    lock_path = tmp_path / "state.lock"
+    # Lock-файл процесса, который упал, не сняв блокировку
+    lock_path.write_text("12345")
+    os.utime(lock_path, (0, 0))
+    events: list[str] = []
+
+    async def hold(name: str) -> None:
+        async with file_lock(lock_path, timeout=5):
+            events.append(f"{name} acquired")
+            await asyncio.sleep(0.1)
+            events.append(f"{name} released")
+
+    async def main() -> None:
+        await asyncio.gather(hold("first"), hold("second"))
+
+    asyncio.run(main())
+    assert events[0].endswith("acquired")
+    assert events[1] == events[0].replace("acquired", "released")
+    assert not lock_path.exists()
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+from parser.chunking import CHUNK_KEYS, Chunk, ChunkSink, chunk_markdown, count_tokens
+from parser.datastructures import ChapterNode
+
+DOCUMENT = """Работа с запросами
+==================
+
+Введение в язык запросов.
+
+Пример запроса
+--------------
+
+Текст примера.
+
+### Параметры
+
+Описание параметров.
+
+# Другой раздел
+
+Текст раздела."""
+
+
+def test_chunks_follow_heading_boundaries() -> None:
+    chunks = list(chunk_markdown(DOCUMENT, max_tokens=512, overlap_tokens=0))
+    assert [(headings, text) for headings, text, _ in chunks] == [
+        (["Работа с запросами"], "Введение в язык запросов."),
+        (["Работа с запросами", "Пример запроса"], "Текст примера."),
+        (["Работа с запросами", "Пример запроса", "Параметры"], "Описание параметров."),
+        (["Другой раздел"], "Текст раздела."),
+    ]
+
+
+def test_chunks_do_not_exceed_budget() -> None:
+    paragraphs = "\n\n".join(f"Абзац {number} " + "слово " * 30 for number in range(20))
+    markdown = f"# Раздел\n\n{paragraphs}\n\n{'длинная строка ' * 300}"
+    chunks = list(chunk_markdown(markdown, max_tokens=64, overlap_tokens=16))
+    assert len(chunks) > 1
+    for headings, text, tokens in chunks:
+        assert headings == ["Раздел"]
+        assert tokens == count_tokens(text)
+        assert tokens <= 64
+
+
+def test_chunks_overlap_within_section() -> None:
+    paragraphs = [f"Абзац {number} " + "слово " * 10 for number in range(6)]
+    chunks = list(chunk_markdown("\n\n".join(paragraphs), max_tokens=40, overlap_tokens=15))
+    assert len(chunks) > 1
+    for (_, previous, _), (_, current, _) in zip(chunks, chunks[1:], strict=False):
+        assert current.startswith(previous.split("\n\n")[-1])
+
+
+def test_chunk_sink_writes_shards(tmp_path: Path) -> None:
+    chapter = ChapterNode("kip", "https://its.1c.ru/db/kip")
+    with ChunkSink(tmp_path, shard_size=2, max_tokens=512, overlap_tokens=0) as sink:
+        sink.write(chapter, DOCUMENT)
+    shards = sorted(tmp_path.glob("part-*.jsonl"))
+    assert [shard.name for shard in shards] == ["part-00000.jsonl", "part-00001.jsonl"]
+    rows = [
+        json.loads(line)
+        for shard in shards
+        for line in shard.read_text(encoding="utf-8").splitlines()
+    ]
+    assert [row["chunk_index"] for row in rows] == [0, 1, 2, 3]
+    assert all(row["url"] == chapter.url for row in rows)
+
+
+def test_chunk_sink_replaces_shards_unless_appending(tmp_path: Path) -> None:
+    chapter = ChapterNode("kip", "https://its.1c.ru/db/kip")
+    for append in (False, False, True):
+        with ChunkSink(tmp_path, shard_size=10, append=append) as sink:
+            sink.write(chapter, DOCUMENT)
+    assert sorted(shard.name for shard in tmp_path.glob("part-*.jsonl")) == [
+        "part-00000.jsonl", "part-00001.jsonl"
+    ]
+
+
+def test_chunk_keys_match_chunk_fields() -> None:
+    assert CHUNK_KEYS == tuple(Chunk.__annotations__)
@@ -0,0 +1,96 @@
+import pytest
+
+from parser.datastructures import ChapterNode
+
+
+def build_tree() -> ChapterNode:
+    return ChapterNode("kip", "/db/kip", [
+        ChapterNode("part 1", "/db/kip/1", [
+            ChapterNode("doc 1.1", "/db/kip/1/1"),
+            ChapterNode("doc 1.2", "/db/kip/1/2"),
+        ]),
+        ChapterNode("part 2", "/db/kip/2", [
+            ChapterNode("doc 2.1", "/db/kip/2/1"),
+        ]),
+    ])
+
+
+def test_find_looks_up_nodes_by_url() -> None:
+    root = build_tree()
+    node = root.find("/db/kip/2/1")
+    assert node is not None
+    assert node.name == "doc 2.1"
+    assert root.find("/db/kip/3") is None
+
+
+def test_find_is_limited_to_subtree() -> None:
+    root = build_tree()
+    part = root.find("/db/kip/1")
+    assert part is not None
+    assert part.find("/db/kip/1/2") is not None
+    assert part.find("/db/kip/2/1") is None
+    assert part.find("/db/kip") is None
+
+
+def test_find_returns_duplicate_url_from_subtree() -> None:
+    root = build_tree()
+    part = root.find("/db/kip/2")
+    assert part is not None
+    duplicate = ChapterNode("doc 1.1 copy", "/db/kip/1/1")
+    part.add_child(duplicate)
+    assert root.find("/db/kip/1/1") is not duplicate
+    assert part.find("/db/kip/1/1") is duplicate
+
+
+def test_path_and_depth() -> None:
+    root = build_tree()
+    node = root.find("/db/kip/1/2")
+    assert node is not None
+    assert node.path() == "kip|part 1|doc 1.2"
+    assert node.current_depth() == 2
+    assert node.lineage() == [
+        ("kip", "/db/kip"), ("part 1", "/db/kip/1"), ("doc 1.2", "/db/kip/1/2")
+    ]
+    assert root.max_depth() == 2
+
+
+def test_add_child_moves_node_from_previous_parent() -> None:
+    root = build_tree()
+    first, second = root.children
+    node = root.find("/db/kip/1/2")
+    assert node is not None
+    assert node.path() == "kip|part 1|doc 1.2"
+
+    second.add_child(node)
+    assert [child.url for child in first.children] == ["/db/kip/1/1"]
+    assert [child.url for child in second.children] == ["/db/kip/2/1", "/db/kip/1/2"]
+    assert node.parent is second
+    assert node.path() == "kip|part 2|doc 1.2"
+    assert first.find("/db/kip/1/2") is None
+    assert second.find("/db/kip/1/2") is node
+
+
+def test_add_child_moves_subtree_to_another_tree() -> None:
+    root = build_tree()
+    part = root.find("/db/kip/1")
+    assert part is not None
+    other = ChapterNode("other", "/db/other")
+    other.add_child(part)
+
+    assert root.find("/db/kip/1") is None
+    assert root.find("/db/kip/1/1") is None
+    assert [child.url for child in root.children] == ["/db/kip/2"]
+    leaf = other.find("/db/kip/1/1")
+    assert leaf is not None
+    assert leaf.path() == "other|part 1|doc 1.1"
+    assert leaf.current_depth() == 2
+
+
+def test_add_child_rejects_cycles() -> None:
+    root = build_tree()
+    part = root.find("/db/kip/1")
+    assert part is not None
+    with pytest.raises(ValueError, match="subtree"):
+        part.children[0].add_child(part)
+    with pytest.raises(ValueError, match="subtree"):
+        part.add_child(part)
@@ -0,0 +1,58 @@
+import asyncio
+from collections import deque
+from pathlib import Path
+
+from parser.constants import URL
+from parser.datastructures import ChapterNode
+from parser.journal import CrawlJournal
+from parser.modules.db import TocItem, _drain, build_chapter_tree
+
+DB_PATH = "/db/kip"
+
+
+def test_drain_keeps_chapter_order_and_marks_before_yield(tmp_path: Path) -> None:
+    chapters = [ChapterNode(f"doc {number}", f"{DB_PATH}/{number}") for number in range(3)]
+
+    async def parse(chapter: ChapterNode, delay: float) -> tuple[ChapterNode, str]:
+        await asyncio.sleep(delay)
+        return chapter, chapter.name
+
+    async def main(journal: CrawlJournal) -> list[str]:
+        pending = deque(
+            asyncio.create_task(parse(chapter, delay))
+            for chapter, delay in zip(chapters, (0.03, 0.01, 0.02), strict=True)
+        )
+        received: list[str] = []
+        async for chapter, _ in _drain(pending, ordered=True, keep=0, journal=journal):
+            received.append(chapter.url)
+            # Потребитель останавливает обход на втором документе
+            if len(received) == 2:
+                break
+        for task in pending:
+            task.cancel()
+        return received
+
+    with CrawlJournal(tmp_path / "journal.sqlite3") as journal:
+        journal.register(DB_PATH, (chapter.url for chapter in chapters))
+        received = asyncio.run(main(journal))
+        assert received == [chapters[0].url, chapters[1].url]
+        assert journal.urls(DB_PATH, "done") == set(received)
+
+
+def test_build_chapter_tree_skips_items_without_link() -> None:
+    items: list[TocItem] = [
+        {"name": "doc 1", "href": "/db/kip/1", "children": []},
+        {"name": "group", "href": None, "children": [
+            {"name": "doc 2", "href": "/db/kip/2", "children": [
+                {"name": "doc 2.1", "href": "/db/kip/2/1", "children": []},
+            ]},
+            {"name": "empty", "href": None, "children": []},
+        ]},
+        {"name": "doc 3", "href": "/db/kip/3", "children": []},
+    ]
+    root = build_chapter_tree(items, ChapterNode("Root", f"{URL}{DB_PATH}"))
+    assert [child.name for child in root.children] == ["doc 1", "doc 2", "doc 3"]
+    assert [node.url for node in root.iterate_leaves()] == [
+        f"{URL}/db/kip/1", f"{URL}/db/kip/2/1", f"{URL}/db/kip/3"
+    ]
+    assert not any(node.url.endswith("None") for node in root.iterate_dfs())
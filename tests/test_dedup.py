@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+
+from parser.datastructures import ChapterNode
+from parser.dedup import BlockStore, DedupSink, split_blocks
+
+FOOTER = "Все права защищены. Использование материалов возможно только с разрешения владельца."
+
+
+def test_split_blocks_by_blank_lines() -> None:
+    assert list(split_blocks("a\nb\n\n\nc\n\n")) == ["a\nb", "c"]
+
+
+def test_split_blocks_keeps_code_fences_whole() -> None:
+    markdown = "text\n\n```\nfirst\n\nsecond\n```\n\nafter"
+    assert list(split_blocks(markdown)) == ["text", "```\nfirst\n\nsecond\n```", "after"]
+
+
+def test_block_store_stores_repeated_blocks_once(tmp_path: Path) -> None:
+    store = BlockStore(tmp_path)
+    first = store.add_block(FOOTER)
+    second = store.add_block(FOOTER)
+    store.close()
+    assert first == second == {"hash": first["hash"]}
+    assert len(list((tmp_path / "blocks").rglob("*.md"))) == 1
+
+
+def test_block_store_inlines_short_blocks(tmp_path: Path) -> None:
+    store = BlockStore(tmp_path, min_block_size=64)
+    assert store.add_block("short") == {"text": "short"}
+    store.close()
+    assert not list((tmp_path / "blocks").rglob("*.md"))
+
+
+def test_block_store_restores_document(tmp_path: Path) -> None:
+    markdown = f"# Title\n\n{'body ' * 20}\n\n```\ncode\n\nmore code\n```\n\n{FOOTER}"
+    store = BlockStore(tmp_path)
+    blocks = [store.add_block(block) for block in split_blocks(markdown)]
+    assert store.restore_document(blocks) == markdown
+    store.close()
+
+
+def test_block_store_records_each_image_once(tmp_path: Path) -> None:
+    store = BlockStore(tmp_path)
+    image = "![схема](https://its.1c.ru/image/a.png)"
+    assert store.add_images(f"{image}\n\n{image}") == ["https://its.1c.ru/image/a.png"] * 2
+    store.add_images(image)
+    store.close()
+    assert (tmp_path / "images.txt").read_text().split() == ["https://its.1c.ru/image/a.png"]
+
+
+def test_dedup_sink_shares_blocks_between_documents(tmp_path: Path) -> None:
+    root = ChapterNode("kip", "https://its.1c.ru/db/kip")
+    for number in range(2):
+        root.add_child(ChapterNode(f"doc {number}", f"https://its.1c.ru/db/kip/{number}"))
+    with DedupSink(tmp_path / "kip.dedup.jsonl", tmp_path / "store") as sink:
+        for number, chapter in enumerate(root.iterate_leaves()):
+            sink.write(chapter, f"Документ {number} {'текст ' * 20}\n\n{FOOTER}")
+    documents = [
+        json.loads(line)
+        for line in (tmp_path / "kip.dedup.jsonl").read_text(encoding="utf-8").splitlines()
+    ]
+    assert len(documents) == 2
+    assert documents[0]["blocks"][-1] == documents[1]["blocks"][-1]
+    assert len(list((tmp_path / "store" / "blocks").rglob("*.md"))) == 3
+
+
+def test_block_store_records_image_once_across_stores(tmp_path: Path) -> None:
+    # Два обработчика (или два запуска) с общим хранилищем
+    image = "![схема](https://its.1c.ru/image/a.png)"
+    first = BlockStore(tmp_path)
+    second = BlockStore(tmp_path)
+    first.add_images(image)
+    second.add_images(f"{image}\n\n![](https://its.1c.ru/image/b.png)")
+    first.close()
+    second.close()
+    assert (tmp_path / "images.txt").read_text().split() == [
+        "https://its.1c.ru/image/a.png", "https://its.1c.ru/image/b.png"
+    ]
+
+
+def test_duplication_ratio_counts_blocks_stored_by_previous_runs(tmp_path: Path) -> None:
+    previous = BlockStore(tmp_path)
+    previous.add_block(FOOTER)
+    previous.close()
+
+    store = BlockStore(tmp_path)
+    assert store.duplication_ratio() == 0.0
+    store.add_block(FOOTER)
+    assert store.duplication_ratio() == 0.0
+    store.add_block(FOOTER)
+    assert store.duplication_ratio() == 0.5
+    store.close()
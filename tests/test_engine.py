@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import Iterator
+
+from parser.engine import DetailLink, SiteAdapter, crawl_site
+
+ITEMS = 100
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages: list[FakePage] = []
+
+    async def new_page(self) -> FakePage:
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.contexts = [FakeContext()]
+
+
+class FakeAdapter(SiteAdapter):
+    name = "fake"
+    base_url = "https://example.com"
+    listing_page_type = "fake_listing"
+    detail_page_type = "fake_detail"
+    content_selector = "#content"
+
+    def __init__(self, listings: int = 2, links_per_listing: int = ITEMS // 2) -> None:
+        self._listings = listings
+        self._links_per_listing = links_per_listing
+
+    def listings(self) -> Iterator[str]:
+        return (f"{self.base_url}/list/{number}" for number in range(self._listings))
+
+    async def open_listing(self, page, listing):  # noqa: ANN001, ANN202, ARG002
+        self._listing = listing
+
+    async def extract_links(self, page):  # noqa: ANN001, ANN202, ARG002
+        listing = self._listing
+        return [
+            DetailLink(url=f"{listing}/{number}", title=f"{listing} {number}")
+            for number in range(self._links_per_listing)
+        ]
+
+    async def extract_content(self, page, link):  # noqa: ANN001, ANN202, ARG002
+        await asyncio.sleep(0)
+        return f"<p>{link.title}</p>"
+
+
+def test_crawl_site_yields_every_link() -> None:
+    async def crawl() -> list[str]:
+        return [link.url async for link, _ in crawl_site(FakeBrowser(), FakeAdapter(), 2)]
+
+    urls = asyncio.run(crawl())
+    assert len(urls) == ITEMS
+    assert len(set(urls)) == ITEMS
+
+
+def test_crawl_site_early_close_does_not_hang() -> None:
+    browser = FakeBrowser()
+
+    async def crawl() -> int:
+        generator = crawl_site(browser, FakeAdapter(), concurrency=2)
+        count = 0
+        async for _ in generator:
+            count += 1
+            if count == 3:
+                # Даём загрузчикам заполнить очередь результатов
+                await asyncio.sleep(0.1)
+                break
+        await asyncio.wait_for(generator.aclose(), timeout=5)
+        return count
+
+    assert asyncio.run(crawl()) == 3
+    assert all(page.closed for page in browser.contexts[0].pages)
@@ -0,0 +1,28 @@
+import asyncio
+
+from yarl import URL
+
+from parser.http import create_http_session
+
+SESSION_VALUE = 'a b,"c"=d\\e'
+
+
+class FakeContext:
+    async def cookies(self) -> list[dict[str, str]]:
+        return [
+            {"name": "session", "value": SESSION_VALUE, "domain": "its.1c.ru", "path": "/"},
+            {"name": "plain", "value": "xyz", "domain": ".its.1c.ru", "path": "/db"},
+        ]
+
+
+def test_create_http_session_keeps_raw_cookie_values() -> None:
+    async def filter_cookies(url: str) -> dict[str, str]:
+        session = await create_http_session(FakeContext())  # type: ignore[arg-type]
+        async with session:
+            cookies = session.cookie_jar.filter_cookies(URL(url))
+            return {name: morsel.coded_value for name, morsel in cookies.items()}
+
+    assert asyncio.run(filter_cookies("https://its.1c.ru/db/kip")) == {
+        "session": SESSION_VALUE, "plain": "xyz"
+    }
+    assert asyncio.run(filter_cookies("https://its.1c.ru/news")) == {"session": SESSION_VALUE}
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from parser.utils import LinkFilter, md_links_filter, transform_html
+
+BASE_URL = "https://its.1c.ru"
+
+
+@pytest.mark.parametrize(
+    ("md_text", "expected"),
+    [
+        ("see [doc](/db/kip#x) end", "see doc end"),
+        ('see [doc](https://its.1c.ru/db/x "title") end', "see doc end"),
+        ("see [doc](https://v8.its.1c.ru/db/x) end", "see doc end"),
+        ("see [ext](https://example.com/a) end", "see [ext](https://example.com/a) end"),
+        (
+            "see [ext](https://example.com/?ref=its.1c.ru) end",
+            "see [ext](https://example.com/?ref=its.1c.ru) end",
+        ),
+        (
+            "see [ext](https://its.1c.ru.evil.org/x) end",
+            "see [ext](https://its.1c.ru.evil.org/x) end",
+        ),
+        ("see [ext](//cdn.example.com/x) end", "see [ext](//cdn.example.com/x) end"),
+        ("![img](https://its.1c.ru/image/a.png)", "![img](https://its.1c.ru/image/a.png)"),
+        (
+            "[![img](https://its.1c.ru/image/a.png)](/db/a) ok",
+            "![img](https://its.1c.ru/image/a.png) ok",
+        ),
+        ("bare https://its.1c.ru/db/x and more", "bare  and more"),
+        ("bare https://example.com/x.", "bare https://example.com/x."),
+        ("(see https://its.1c.ru/db/x)", "(see )"),
+        ("(see https://example.com/x), ok", "(see https://example.com/x), ok"),
+        ("wiki https://example.com/a_(b)", "wiki https://example.com/a_(b)"),
+        ("see [doc](/db/kip_(1)) end", "see doc end"),
+        ("see [doc](https://its.1c.ru/a_(b) \"title\") end", "see doc end"),
+        ("see [ext](https://example.com/a_(b)) end", "see [ext](https://example.com/a_(b)) end"),
+        ("[doc](/db/x) (note)", "doc (note)"),
+        ("go <https://its.1c.ru/db/x> now", "go  now"),
+        ("go <https://example.com/x> now", "go <https://example.com/x> now"),
+        ("text with a / slash", "text with a / slash"),
+        ("unclosed [ bracket and ] (paren)", "unclosed [ bracket and ] (paren)"),
+        ("[a]\n(/b)", "[a]\n(/b)"),
+    ],
+)
+def test_md_links_filter(md_text: str, expected: str) -> None:
+    assert md_links_filter(md_text, BASE_URL) == expected
+
+
+@pytest.mark.parametrize(
+    ("target", "expected"),
+    [
+        ("/db/kip", True),
+        ("https://its.1c.ru/db/kip", True),
+        ("https://ITS.1c.ru:443/db/kip", True),
+        ("https://v8.its.1c.ru/db/kip", True),
+        ("//its.1c.ru/db/kip", True),
+        ("//cdn.example.com/x", False),
+        ("https://its.1c.ru.evil.org/x", False),
+        ("https://example.com/?ref=its.1c.ru", False),
+        ("http://[broken", False),
+    ],
+)
+def test_is_site_link(target: str, expected: bool) -> None:
+    assert LinkFilter(BASE_URL).is_site_link(target) is expected
+
+
+@pytest.mark.parametrize(
+    "md_text",
+    [
+        "[" * 200_000,
+        "[a](" * 100_000,
+        "![" * 100_000,
+        "[a](" * 100_000 + ")",
+        "<https://" * 50_000,
+    ],
+)
+def test_md_links_filter_is_linear_on_unbalanced_brackets(md_text: str) -> None:
+    started = time.perf_counter()
+    assert md_links_filter(md_text, BASE_URL) == md_text
+    assert time.perf_counter() - started < 5
+
+
+def test_transform_html_removes_site_links_and_preserves_images() -> None:
+    tree = transform_html(
+        '<p>a <a href="/db/x">site</a> <a href="https://example.com">ext</a>'
+        '<img src="/image/a.png"></p>',
+        BASE_URL,
+    )
+    html = str(tree)
+    assert "/db/x" not in html
+    assert '<a href="https://example.com">ext</a>' in html
+    assert f'<img src="{BASE_URL}/image/a.png"/>' in html
@@ -0,0 +1,118 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from parser import work_queue
+from parser.datastructures import ChapterNode
+from parser.work_queue import SQLiteWorkQueue, WorkItem
+
+LEASE_TIMEOUT = 60
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(work_queue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path: Path) -> Iterator[SQLiteWorkQueue]:
+    with SQLiteWorkQueue(tmp_path / "queue.sqlite3") as queue:
+        root = ChapterNode("kip", "https://its.1c.ru/db/kip")
+        for number in range(3):
+            root.add_child(ChapterNode(f"doc {number}", f"https://its.1c.ru/db/kip/{number}"))
+        queue.put(WorkItem.from_chapter("/db/kip", chapter) for chapter in root.iterate_leaves())
+        yield queue
+
+
+def test_claim_leases_each_item_once(queue: SQLiteWorkQueue) -> None:
+    claimed = [queue.claim("worker-1", LEASE_TIMEOUT) for _ in range(3)]
+    assert all(item is not None for item in claimed)
+    assert len({item.url for item in claimed if item is not None}) == 3
+    assert queue.claim("worker-2", LEASE_TIMEOUT) is None
+    assert queue.counts() == {"leased": 3}
+
+
+def test_claimed_item_restores_chapter_path(queue: SQLiteWorkQueue) -> None:
+    item = queue.claim("worker-1", LEASE_TIMEOUT)
+    assert item is not None
+    chapter = item.chapter()
+    assert chapter.url == item.url
+    assert chapter.path().startswith("kip")
+
+
+def test_expired_lease_is_claimed_again(queue: SQLiteWorkQueue, clock: Clock) -> None:
+    first = queue.claim("worker-1", LEASE_TIMEOUT)
+    assert first is not None
+    clock.now += LEASE_TIMEOUT / 2
+    others = [queue.claim("worker-2", LEASE_TIMEOUT) for _ in range(2)]
+    assert first.url not in {item.url for item in others if item is not None}
+    assert queue.claim("worker-2", LEASE_TIMEOUT) is None
+
+    clock.now += LEASE_TIMEOUT
+    assert queue.claim("worker-3", LEASE_TIMEOUT) is None
+    assert queue.reclaim_expired(max_attempts=3) == 1
+    reclaimed = queue.claim("worker-3", LEASE_TIMEOUT)
+    assert reclaimed is not None
+    assert reclaimed.url == first.url
+    assert reclaimed.attempts == 1
+
+
+def test_reclaim_expired_returns_leases_to_pending(queue: SQLiteWorkQueue, clock: Clock) -> None:
+    item = queue.claim("worker-1", LEASE_TIMEOUT)
+    assert item is not None
+    assert queue.reclaim_expired(max_attempts=3) == 0
+    clock.now += LEASE_TIMEOUT + 1
+    assert queue.reclaim_expired(max_attempts=3) == 1
+    assert queue.counts() == {"pending": 3}
+
+
+def test_expired_leases_fail_after_max_attempts(queue: SQLiteWorkQueue, clock: Clock) -> None:
+    # Документ, на котором обработчик каждый раз падает, не возвращается в очередь бесконечно
+    url = None
+    for _ in range(2):
+        item = queue.claim("worker-1", LEASE_TIMEOUT)
+        assert item is not None
+        url = url or item.url
+        assert item.url == url
+        clock.now += LEASE_TIMEOUT + 1
+        queue.reclaim_expired(max_attempts=2)
+    assert queue.counts() == {"failed": 1, "pending": 2}
+
+
+def test_completed_item_is_not_claimed_after_lease_expiry(
+        queue: SQLiteWorkQueue, clock: Clock
+) -> None:
+    item = queue.claim("worker-1", LEASE_TIMEOUT)
+    assert item is not None
+    queue.complete(item.url)
+    clock.now += LEASE_TIMEOUT + 1
+    claimed = [queue.claim("worker-2", LEASE_TIMEOUT) for _ in range(3)]
+    assert item.url not in {other.url for other in claimed if other is not None}
+    assert queue.counts() == {"done": 1, "leased": 2}
+
+
+def test_fail_retries_until_max_attempts(queue: SQLiteWorkQueue) -> None:
+    url = None
+    for _ in range(2):
+        item = queue.claim("worker-1", LEASE_TIMEOUT)
+        assert item is not None
+        url = url or item.url
+        assert item.url == url
+        queue.fail(item.url, "TimeoutError", max_attempts=2)
+    assert queue.counts() == {"failed": 1, "pending": 2}
+
+
+def test_put_skips_known_items(queue: SQLiteWorkQueue) -> None:
+    queue.put([WorkItem("https://its.1c.ru/db/kip/0", "/db/kip", [("doc 0", "x")])])
+    assert queue.counts() == {"pending": 3}